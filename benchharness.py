@@ -0,0 +1,69 @@
+"""
+Harness for the frontends' benchmark suites.
+
+A suite is a cases(quick) generator of (name, params, bench) triples,
+where bench(repeats) returns the best and mean seconds of its repeats.
+main() runs the cases and prints one line for each. It appends every
+result as one JSON line to --out, tagged with the time, git commit and
+Python version, so the scaling curves can be compared across commits.
+The default results file is ignored by git.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+REPEATS = 5
+RESULTS_NAME = "benchmark_results.jsonl"
+
+
+def measure(fn, setup=None, repeats=REPEATS):
+    # setup() runs untimed before every repeat and its result is passed to fn
+    times = []
+    for _ in range(repeats):
+        arg = setup() if setup is not None else None
+        t0 = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - t0)
+    return min(times), sum(times) / len(times)
+
+
+def git_commit(cwd):
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=cwd)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def main(suite, cases, description, folder):
+    """Command line for one suite; folder holds its default results file."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--quick", action="store_true", help="smallest size and agent count only")
+    parser.add_argument("--only", metavar="NAME", help="run only cases whose name contains NAME")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--out", default=os.path.join(folder, RESULTS_NAME),
+                        help="JSON lines file the results are appended to (default: %(default)s)")
+    args = parser.parse_args()
+
+    run = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(folder),
+           "python": platform.python_version(), "suite": suite}
+    rows = []
+    for name, params, bench in cases(args.quick):
+        if args.only and args.only not in name:
+            continue
+        best, mean = bench(args.repeats)
+        rows.append(dict(run, name=name, params=params, best_ms=round(best * 1000, 4),
+                         mean_ms=round(mean * 1000, 4), repeats=args.repeats))
+        label = " ".join(f"{k}={v}" for k, v in params.items())
+        print(f"{name:<22}{label:<44}{best*1000:>10.3f} ms best{mean*1000:>10.3f} ms mean")
+        sys.stdout.flush()
+
+    with open(args.out, "a") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    print(f"{len(rows)} results appended to {args.out}")
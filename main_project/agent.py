@@ -1,25 +1,34 @@
 import random
 
-GRID_SIZE = 21
+import rootpath  # puts the repository root on sys.path
+import mazefile
+
 CELL_SIZE = 25
 AGENT_SIZE = 20
 
 class Agent:
-    def __init__(self, root, canvas, maze, color="red"):
+    # no per-agent __dict__; "agent" is the canvas item id (the rendering handle)
+    __slots__ = ("root", "canvas", "maze", "agent_row", "agent_col", "agent", "rng")
+
+    def __init__(self, root, canvas, maze, color="red", scheduler=None, rng=None):
+        self.rng = rng if rng is not None else random.Random()  # own seeded stream
         self.root = root
         self.canvas = canvas
         self.maze = maze
 
-        # Start agent at center (should be a path)
-        self.agent_row, self.agent_col = GRID_SIZE // 2, GRID_SIZE // 2
-        if self.maze[self.agent_row][self.agent_col] == 1:  # fallback if center is wall
-            self.agent_row, self.agent_col = 0, 0
+        # Start agent at center, or the nearest path to it; the maze may be any size
+        self.agent_row, self.agent_col = mazefile.nearest_open(
+            lambda r, c: maze[r][c] == 0, len(maze), len(maze[0]), len(maze) // 2, len(maze[0]) // 2)
 
         # Create agent circle
         self.agent = self.create_agent(self.agent_row, self.agent_col, color)
 
-        # Start automatic random movement
-        self.random_move()
+        # Start automatic random movement: a shared Scheduler ticks every
+        # agent together, otherwise this agent runs its own after() chain
+        if scheduler is not None:
+            scheduler.add(self)
+        else:
+            self.random_move()
 
     def create_agent(self, row, col, color):
         x0 = col*CELL_SIZE + (CELL_SIZE-AGENT_SIZE)//2
@@ -29,25 +38,31 @@ class Agent:
         return self.canvas.create_oval(x0, y0, x1, y1, fill=color)
 
     def move_agent(self, new_row, new_col):
-        if 0 <= new_row < GRID_SIZE and 0 <= new_col < GRID_SIZE:
+        if 0 <= new_row < len(self.maze) and 0 <= new_col < len(self.maze[0]):
             if self.maze[new_row][new_col] == 0:  # only move if path
                 dx = (new_col - self.agent_col) * CELL_SIZE
                 dy = (new_row - self.agent_row) * CELL_SIZE
                 self.canvas.move(self.agent, dx, dy)
                 self.agent_row, self.agent_col = new_row, new_col
 
-    def random_move(self):
-        """Try random directions and move to the first valid path neighbor."""
+    def choose_move(self):
+        """Pick a random valid path neighbor; returns (row, col) or None."""
         directions = [(-1,0), (1,0), (0,-1), (0,1)]  # up, down, left, right
-        random.shuffle(directions)
+        self.rng.shuffle(directions)
 
         for dr, dc in directions:
             new_row = self.agent_row + dr
             new_col = self.agent_col + dc
-            if 0 <= new_row < GRID_SIZE and 0 <= new_col < GRID_SIZE:
+            if 0 <= new_row < len(self.maze) and 0 <= new_col < len(self.maze[0]):
                 if self.maze[new_row][new_col] == 0:
-                    self.move_agent(new_row, new_col)
-                    break
+                    return new_row, new_col
+        return None
+
+    def random_move(self):
+        """Try random directions and move to the first valid path neighbor."""
+        nxt = self.choose_move()
+        if nxt is not None:
+            self.move_agent(*nxt)
 
         # call again after 200 ms
         self.root.after(200, self.random_move)
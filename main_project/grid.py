@@ -1,21 +1,39 @@
 from tkinter import *
 
+import rootpath  # puts the repository root on sys.path
+import mazefile
+from wallrects import draw_walls
+
 GRID_SIZE = 21        # 21x21 grid (odd better for centered start)
 CELL_SIZE = 25        # pixels
 AGENT_SIZE = 15       # diameter in pixels
 center = GRID_SIZE // 2 # Get the center index
+GRID_CODES = (1, 0, 0)  # maze values for mazefile WALL, OPEN, SHARED
+
+def save_grid(path, maze):
+    # Write a 0/1 maze matrix to a maze file
+    kinds = ([GRID_CODES.index(v) for v in row] for row in maze)
+    mazefile.write_maze(path, len(maze), len(maze[0]), kinds)
+
 class Create_Grid:
-    def __init__(self, root):
+    def __init__(self, root, as_image=False, maze_file=None):
         self.root = root
+        self.as_image = as_image  # render the static maze once into a PhotoImage
+
+        # Maze matrix: wall when BOTH row and col are odd, unless a mapped
+        # mazefile.MazeFile is given (read in place, same 0/1 values)
+        if maze_file is not None:
+            self.maze = maze_file.view(GRID_CODES)
+        else:
+            self.maze = self.generate_maze()
+        self.rows, self.cols = len(self.maze), len(self.maze[0])
+
         self.canvas = Canvas(root,
-                             width=GRID_SIZE*CELL_SIZE,
-                             height=GRID_SIZE*CELL_SIZE,
+                             width=self.cols*CELL_SIZE,
+                             height=self.rows*CELL_SIZE,
                              bg="white")
         self.canvas.pack()
 
-        # Maze matrix: wall when BOTH row and col are odd
-        self.maze = self.generate_maze()
-
         # Draw maze
         self.draw_maze()
 
@@ -37,11 +55,5 @@ class Create_Grid:
         return maze
 
     def draw_maze(self):
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                x0, y0 = c*CELL_SIZE, r*CELL_SIZE
-                x1, y1 = x0+CELL_SIZE, y0+CELL_SIZE
-                if self.maze[r][c] == 1:
-                    self.canvas.create_rectangle(x0, y0, x1, y1, fill="black", outline="")
-                else:
-                    self.canvas.create_rectangle(x0, y0, x1, y1, fill="white", outline="")
+        """Draw the walls (see wallrects.draw_walls); as_image=True draws one PhotoImage."""
+        self.maze_image = draw_walls(self.canvas, self.maze, CELL_SIZE, self.as_image)
@@ -1,17 +1,35 @@
+import random
 from tkinter import *
+import rootpath  # puts the repository root on sys.path
+import mazefile
 from grid import Create_Grid
 from agent import Agent
+from scheduler import Scheduler
+
+AGENT_COLORS = ["red", "blue", "green"]
+SEED = None  # set an int to repeat the same walks
+MAZE_PATH = None  # e.g. 'level.pmaz' to load a maze file instead of the odd/odd grid
+
+def on_close(root, scheduler):
+    scheduler.stop()
+    print(scheduler.summary())
+    root.destroy()
 
 if __name__ == "__main__":
     root = Tk()
     root.title("Pacman Game with Multi Agent")
 
     # Create grid
-    app = Create_Grid(root)
+    app = Create_Grid(root, maze_file=mazefile.MazeFile(MAZE_PATH) if MAZE_PATH else None)
 
-    # Add agents (you can spawn more with different colors)
-    agent1 = Agent(root, app.canvas, app.maze, color="red")
-    agent2 = Agent(root, app.canvas, app.maze, color="blue")
-    agent3 = Agent(root, app.canvas, app.maze, color="green")
+    # All agents move on one shared tick (add more colors to spawn more)
+    scheduler = Scheduler(root)
+    # one seed, one independent random stream per agent
+    rng = random.Random(SEED)
+    agents = [Agent(root, app.canvas, app.maze, color=c, scheduler=scheduler,
+                    rng=random.Random(rng.getrandbits(64)))
+              for c in AGENT_COLORS]
+    scheduler.start()
 
+    root.protocol("WM_DELETE_WINDOW", lambda: on_close(root, scheduler))
     root.mainloop()
@@ -0,0 +1,59 @@
+import time
+
+TICK_MS = 200         # same pace the agents used with their own after() chains
+
+
+class Scheduler:
+    """
+    One root.after() chain that advances every agent per tick,
+    instead of one timer per agent drifting apart in the Tk queue.
+    """
+
+    def __init__(self, root, interval=TICK_MS):
+        self.root = root
+        self.interval = interval
+        self.agents = []
+        self.ticks = 0
+        # tick latency in ms (time spent inside tick(), not the wait between)
+        self.last_ms = 0.0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.running = False
+
+    def add(self, agent):
+        self.agents.append(agent)
+
+    def start(self):
+        self.running = True
+        self.root.after(self.interval, self.tick)
+
+    def stop(self):
+        self.running = False
+
+    def tick(self):
+        if not self.running:
+            return
+        start = time.perf_counter()
+
+        # decide every move first, then issue all canvas moves in one pass
+        moves = []
+        for agent in self.agents:
+            nxt = agent.choose_move()
+            if nxt is not None:
+                moves.append((agent, nxt))
+        for agent, (new_row, new_col) in moves:
+            agent.move_agent(new_row, new_col)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.ticks += 1
+        self.last_ms = elapsed
+        self.total_ms += elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+
+        # subtract the work just done so the period stays at `interval`
+        self.root.after(max(1, int(self.interval - elapsed)), self.tick)
+
+    def summary(self):
+        avg = self.total_ms / self.ticks if self.ticks else 0.0
+        return (f"{len(self.agents)} agents, {self.ticks} ticks, "
+                f"tick latency avg {avg:.2f} ms / max {self.max_ms:.2f} ms")
@@ -0,0 +1,111 @@
+"""
+On-disk cache for per-maze precomputation, keyed by maze contents.
+
+Intersections, degree maps, shared-corridor segments and distance
+fields depend only on the maze (and its pellets), yet the frontends
+used to rebuild them on every launch. PrecomputeCache stores each
+result under a SHA-256 of the inputs it was computed from, so a second
+run on the same layout loads them instead, and a changed layout simply
+misses.
+
+Entries are pickles named <key>-<name>-v<FORMAT>.pkl in one directory.
+They hold plain data only (numbers, strings, tuples, lists, dicts,
+sets): a pickled class instance would load only under the module name
+of the process that wrote it, so callers store the state of their
+objects and rebuild them after a load. Anything that fails to load, a
+stored class included, counts as a miss. Callers put a version of
+their own code into the key, so a changed structure misses as well. A
+hit touches the file's mtime, and every store evicts the least recently
+used entries until the directory fits in max_bytes.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pacman-precompute")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+FORMAT = 2  # entry layout; part of every file name
+
+
+def content_key(*parts):
+    """SHA-256 over the given parts; str parts are UTF-8 encoded."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    # Refuses every global, so only builtin containers and scalars load
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"cache entries hold plain data, not {module}.{name}")
+
+
+class PrecomputeCache:
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, name):
+        return os.path.join(self.directory, f"{key}-{name}-v{FORMAT}.pkl")
+
+    def get(self, key, name, default=None):
+        path = self._path(key, name)
+        try:
+            with open(path, "rb") as f:
+                value = _PlainUnpickler(f).load()
+        except Exception:  # missing, truncated, stale or not plain data: a miss
+            return default
+        os.utime(path)  # most recently used
+        return value
+
+    def put(self, key, name, value):
+        # Write beside the target and rename, so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key, name))
+        self.evict()
+
+    def cached(self, key, name, compute):
+        """Return the stored value, or compute(), store and return it.
+
+        compute() must return plain data; see the module docstring.
+        """
+        missing = object()
+        value = self.get(key, name, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.put(key, name, value)
+        return value
+
+    def evict(self):
+        # Drop least recently used entries until the total fits in max_bytes
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
@@ -0,0 +1,383 @@
+"""
+Binary maze file shared by the pygame, turtle and tkinter frontends.
+
+Each frontend used to rebuild its maze in Python loops at startup. A
+maze file holds the finished layout instead, and MazeFile maps it
+read-only, so opening one costs the same at 21x31 as at 20000x20000:
+cells are only read (and paged in by the OS) when something looks at
+them. What a frontend then derives from the maze (pellet sets, degree
+maps, distance fields) still visits every cell once; with NumPy those
+passes are vectorised.
+
+Layout, little-endian, cells in row-major (row, col) order:
+
+    header   magic b"PMAZ", version, rows, cols            (16 bytes)
+    OPEN     1 bit per cell, set for every walkable cell
+    PELLET   1 bit per cell, set where a pellet starts
+    POWER    1 bit per cell, set where a power pellet starts
+    SHARED   1 bit per cell, set on shared-corridor cells
+    ADJ      4 bits per cell, the walkable neighbours as N|E|S|W
+
+Bit planes pad each row to whole bytes, most significant bit first
+(the np.packbits order). ADJ stores two cells per byte, the even
+column in the high nibble.
+"""
+
+import hashlib
+import mmap
+import struct
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # vectorises writing and bulk reads; everything works without it
+    np = None
+
+MAGIC = b"PMAZ"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xII")  # magic, version, rows, cols
+
+# Cell kinds as written by write_maze() and read by kind()
+WALL, OPEN, SHARED = 0, 1, 2
+# ADJ nibble bits
+N, E, S, W = 1, 2, 4, 8
+_STEPS = ((N, -1, 0), (E, 0, 1), (S, 1, 0), (W, 0, -1))
+
+PLANES = ("open", "pellets", "power", "shared")
+
+
+def _sizes(rows, cols):
+    row_bytes = (cols + 7) // 8
+    adj_row_bytes = (cols + 1) // 2
+    return row_bytes, adj_row_bytes
+
+
+def _pack_bits(flags, row_bytes):
+    out = bytearray(row_bytes)
+    for c, flag in enumerate(flags):
+        if flag:
+            out[c >> 3] |= 0x80 >> (c & 7)
+    return out
+
+
+def _digest(rows, cols, planes):
+    # SHA-256 hex over the size and the packed OPEN, PELLET, POWER, SHARED planes
+    h = hashlib.sha256(struct.pack("<II", rows, cols))
+    for plane in planes:
+        h.update(plane)
+    return h.hexdigest()
+
+
+def layout_digest(rows, cols, kinds, pellets, power):
+    """The digest MazeFile.digest() gives for this maze once written.
+
+    `kinds`, `pellets` and `power` are as for write_maze(), except that
+    pellets must be given. A maze held in memory and its maze file copy
+    therefore share cache entries and replay logs.
+    """
+    row_bytes, _ = _sizes(rows, cols)
+    pellet_cols, power_cols = _by_row(pellets), _by_row(power)
+    planes = [bytearray() for _ in PLANES]
+    for r, line in enumerate(kinds):
+        pel, pow_ = set(pellet_cols.get(r, ())), set(power_cols.get(r, ()))
+        planes[0] += _pack_bits([k != WALL for k in line], row_bytes)
+        planes[1] += _pack_bits([c in pel for c in range(cols)], row_bytes)
+        planes[2] += _pack_bits([c in pow_ for c in range(cols)], row_bytes)
+        planes[3] += _pack_bits([k == SHARED for k in line], row_bytes)
+    return _digest(rows, cols, planes)
+
+
+def _by_row(cells):
+    # {row: [col, ...]} for a collection of (row, col) cells
+    rows = defaultdict(list)
+    for r, c in cells:
+        rows[r].append(c)
+    return rows
+
+
+def _row_planes(r, line, above, below, pellet_cols, power_cols):
+    # NumPy packing of one row: the four bit-plane rows and the ADJ row
+    opens = line != WALL
+    power = np.zeros(len(line), dtype=bool)
+    power[power_cols.get(r, [])] = True
+    if pellet_cols is None:
+        pel = (line == OPEN) & ~power
+    else:
+        pel = np.zeros(len(line), dtype=bool)
+        pel[pellet_cols.get(r, [])] = True
+    bits = np.zeros(len(line), dtype=np.uint8)
+    if above is not None:
+        bits |= (above != WALL) * np.uint8(N)
+    if below is not None:
+        bits |= (below != WALL) * np.uint8(S)
+    bits[:-1] |= opens[1:] * np.uint8(E)
+    bits[1:] |= opens[:-1] * np.uint8(W)
+    bits *= opens
+    if len(bits) % 2:
+        bits = np.append(bits, np.uint8(0))
+    adj = (bits[0::2] << 4) | bits[1::2]
+    planes = [np.packbits(p).tobytes() for p in (opens, pel, power, line == SHARED)]
+    return planes, adj.tobytes()
+
+
+def write_maze(path, rows, cols, kinds, pellets=None, power=()):
+    """Write a maze file from `kinds`, an iterable of rows of WALL/OPEN/SHARED.
+
+    `pellets` and `power` are collections of (row, col) cells. Without
+    `pellets` every OPEN cell that is not a power pellet gets one. Rows
+    are consumed one at a time and only three are held at once, so the
+    kinds can be streamed from a generator; rows may be lists or NumPy
+    arrays, and with NumPy each row is packed in a few array operations.
+    """
+    power = set(power)
+    row_bytes, adj_row_bytes = _sizes(rows, cols)
+    plane = rows * row_bytes
+    offsets = [HEADER.size + i * plane for i in range(len(PLANES))]
+    adj_offset = HEADER.size + len(PLANES) * plane
+    power_cols = _by_row(power)
+    pellet_cols = None if pellets is None else _by_row(pellets)
+
+    def write_row_np(f, r, line, above, below):
+        planes, adj = _row_planes(r, line, above, below, pellet_cols, power_cols)
+        for off, packed in zip(offsets, planes):
+            f.seek(off + r * row_bytes)
+            f.write(packed)
+        f.seek(adj_offset + r * adj_row_bytes)
+        f.write(adj)
+
+    def write_row(f, r, line, above, below):
+        opens = [k != WALL for k in line]
+        if pellets is None:
+            pel = [k == OPEN and (r, c) not in power for c, k in enumerate(line)]
+        else:
+            pel = [(r, c) in pellets for c in range(cols)]
+        planes = (opens, pel, [(r, c) in power for c in range(cols)], [k == SHARED for k in line])
+        for off, flags in zip(offsets, planes):
+            f.seek(off + r * row_bytes)
+            f.write(_pack_bits(flags, row_bytes))
+        adj = bytearray(adj_row_bytes)
+        for c in range(cols):
+            if not opens[c]:
+                continue
+            bits = 0
+            if above is not None and above[c] != WALL: bits |= N
+            if c + 1 < cols and line[c + 1] != WALL: bits |= E
+            if below is not None and below[c] != WALL: bits |= S
+            if c > 0 and line[c - 1] != WALL: bits |= W
+            adj[c >> 1] |= bits << (4 if c % 2 == 0 else 0)
+        f.seek(adj_offset + r * adj_row_bytes)
+        f.write(adj)
+
+    if np is not None:
+        write_row, as_row = write_row_np, lambda row: np.asarray(row, dtype=np.uint8)
+    else:
+        as_row = list
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols))
+        f.truncate(adj_offset + rows * adj_row_bytes)
+        above = line = None
+        r = -1
+        for below in kinds:
+            below = as_row(below)
+            if len(below) != cols:
+                raise ValueError(f"row {r + 1} has {len(below)} cells, expected {cols}")
+            if line is not None:
+                write_row(f, r, line, above, below)
+            above, line, r = line, below, r + 1
+        if r != rows - 1:
+            raise ValueError(f"got {r + 1} rows, expected {rows}")
+        if line is not None:
+            write_row(f, r, line, above, None)
+
+
+def nearest_open(is_open, rows, cols, r, c):
+    """The cell closest to (r, c), by steps, for which is_open(row, col) holds.
+
+    Rings of growing distance are scanned in a fixed order, so a maze
+    always gives the same answer. Frontends use it to put agent starts
+    on open cells of mazes they did not lay out. Raises ValueError when
+    no cell is open.
+    """
+    for d in range(rows + cols):
+        for dr in range(-d, d + 1):
+            rr, dc = r + dr, d - abs(dr)
+            if not 0 <= rr < rows:
+                continue
+            for cc in ((c - dc, c + dc) if dc else (c,)):
+                if 0 <= cc < cols and is_open(rr, cc):
+                    return rr, cc
+    raise ValueError("the maze has no open cell")
+
+
+class MazeFile:
+    """Read-only memory map of a maze file.
+
+    `open`, `pellets`, `power`, `shared` and `adjacency` are memoryviews
+    straight into the map; nothing is copied or decoded up front.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            self._file.close()
+            raise ValueError(f"{path} is not a version {VERSION} maze file")
+        self.row_bytes, self.adj_row_bytes = _sizes(self.rows, self.cols)
+        data = memoryview(self._map)
+        plane = self.rows * self.row_bytes
+        for i, name in enumerate(PLANES):
+            start = HEADER.size + i * plane
+            setattr(self, name, data[start:start + plane])
+        start = HEADER.size + len(PLANES) * plane
+        self.adjacency = data[start:start + self.rows * self.adj_row_bytes]
+        self._views = [data] + [getattr(self, name) for name in PLANES] + [self.adjacency]
+
+    def _bit(self, plane, r, c):
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            return False
+        return bool(plane[r * self.row_bytes + (c >> 3)] & (0x80 >> (c & 7)))
+
+    def is_open(self, r, c):
+        return self._bit(self.open, r, c)
+
+    def nearest_open(self, r, c):
+        # Closest open cell to (r, c); see nearest_open()
+        return nearest_open(self.is_open, self.rows, self.cols, r, c)
+
+    def has_pellet(self, r, c):
+        return self._bit(self.pellets, r, c)
+
+    def is_power(self, r, c):
+        return self._bit(self.power, r, c)
+
+    def is_shared(self, r, c):
+        return self._bit(self.shared, r, c)
+
+    def kind(self, r, c):
+        if not self._bit(self.open, r, c):
+            return WALL
+        return SHARED if self._bit(self.shared, r, c) else OPEN
+
+    def adjacent(self, r, c):
+        # N|E|S|W bits of the walkable neighbours of (r, c)
+        byte = self.adjacency[r * self.adj_row_bytes + (c >> 1)]
+        return (byte >> 4) if c % 2 == 0 else (byte & 0x0F)
+
+    def neighbors(self, r, c):
+        bits = self.adjacent(r, c)
+        return [(r + dr, c + dc) for bit, dr, dc in _STEPS if bits & bit]
+
+    def cells(self, plane):
+        """Yield the (row, col) of every set bit in one of the bit planes."""
+        if np is not None:
+            bits = np.unpackbits(np.frombuffer(plane, np.uint8).reshape(self.rows, self.row_bytes), axis=1)
+            rs, cs = np.nonzero(bits[:, :self.cols])
+            yield from zip(rs.tolist(), cs.tolist())
+            return
+        rb = self.row_bytes
+        for i, byte in enumerate(plane):
+            if byte:
+                r, c0 = divmod(i, rb)
+                c0 *= 8
+                for b in range(8):
+                    if byte & (0x80 >> b):
+                        yield r, c0 + b
+
+    def row_kinds(self, r):
+        """WALL/OPEN/SHARED of every cell in row r, as a list."""
+        start = r * self.row_bytes
+        opens = self.open[start:start + self.row_bytes]
+        shared = self.shared[start:start + self.row_bytes]
+        if np is not None:
+            o = np.unpackbits(np.frombuffer(opens, np.uint8))[:self.cols]
+            s = np.unpackbits(np.frombuffer(shared, np.uint8))[:self.cols]
+            return (o + (o & s)).tolist()
+        return [((opens[c >> 3] >> (7 - (c & 7))) & 1) * (1 + ((shared[c >> 3] >> (7 - (c & 7))) & 1))
+                for c in range(self.cols)]
+
+    def degrees(self):
+        # {(row, col): number of walkable neighbours} for every open cell
+        if np is None:
+            return {(r, c): bin(self.adjacent(r, c)).count("1") for r, c in self.cells(self.open)}
+        adj = np.frombuffer(self.adjacency, np.uint8).reshape(self.rows, self.adj_row_bytes)
+        nibbles = np.empty((self.rows, 2 * self.adj_row_bytes), dtype=np.uint8)
+        nibbles[:, 0::2] = adj >> 4
+        nibbles[:, 1::2] = adj & 0x0F
+        popcount = np.array([bin(i).count("1") for i in range(16)], dtype=np.uint8)
+        counts = popcount[nibbles[:, :self.cols]]
+        rs, cs = np.nonzero(self.kinds_array())
+        return dict(zip(zip(rs.tolist(), cs.tolist()), counts[rs, cs].tolist()))
+
+    def digest(self):
+        # SHA-256 hex of the layout and pellets, e.g. as a cache key for
+        # derived data; equal to layout_digest() of the same maze in memory
+        return _digest(self.rows, self.cols, [getattr(self, name) for name in PLANES])
+
+    def view(self, codes):
+        """Row-indexable grid (view[r][c]) mapping WALL/OPEN/SHARED to codes[kind]."""
+        return MazeView(self, codes)
+
+    def grid(self, codes):
+        """The whole maze as a list of row lists of codes[kind], decoded in one pass.
+
+        For simulations that index every cell in their hot loops; view()
+        decodes rows on demand instead.
+        """
+        if np is None:
+            return [list(row) for row in self.view(codes)]
+        return np.array(codes, dtype=object)[self.kinds_array()].tolist()
+
+    def kinds_array(self):
+        # uint8 [rows, cols] array of WALL/OPEN/SHARED, or None without NumPy
+        if np is None:
+            return None
+        shape = (self.rows, self.row_bytes)
+        opens = np.unpackbits(np.frombuffer(self.open, np.uint8).reshape(shape), axis=1)[:, :self.cols]
+        shared = np.unpackbits(np.frombuffer(self.shared, np.uint8).reshape(shape), axis=1)[:, :self.cols]
+        return opens + (opens & shared)
+
+    def close(self):
+        for v in reversed(self._views):
+            v.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MazeView:
+    """Lazy grid[r][c] over a MazeFile for code that indexes list-of-lists mazes.
+
+    Each row is decoded into a plain list the first time it is read and
+    kept, so hot loops pay for list indexing only and rows nobody reads
+    are never decoded.
+    """
+
+    def __init__(self, maze_file, codes):
+        self.maze_file = maze_file
+        self.codes = codes
+        self._rows = [None] * maze_file.rows
+
+    def __len__(self):
+        return self.maze_file.rows
+
+    def __getitem__(self, r):
+        row = self._rows[r]
+        if row is None:
+            if r < 0:
+                return self[r + self.maze_file.rows]
+            codes = self.codes
+            row = self._rows[r] = [codes[k] for k in self.maze_file.row_kinds(r)]
+        return row
+
+    def __iter__(self):
+        for r in range(self.maze_file.rows):
+            yield self[r]
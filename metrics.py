@@ -0,0 +1,56 @@
+"""
+Per-tick metrics export shared by the simulations.
+
+MetricsSink streams one row per tick to CSV or NDJSON through a
+fixed-size buffer, so a long run uses constant memory and the tick loop
+mostly pays for a list append.
+"""
+
+import csv
+import json
+
+
+class MetricsSink:
+    """Streams one row per tick to CSV or NDJSON (picked from the file suffix).
+
+    Rows are held in a buffer of at most buffer_rows entries and written out
+    in one go when it fills, and on close(). Use it as a context manager to
+    have it closed when the run ends, however it ends.
+    """
+
+    def __init__(self, path, fmt=None, buffer_rows=1000):
+        self.fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        self.fp = open(path, "w", newline="")
+        self.buffer_rows = buffer_rows
+        self.buffer = []
+        self.csv = None
+
+    def write(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.fmt == "ndjson":
+            self.fp.write("".join(json.dumps(row) + "\n" for row in self.buffer))
+        else:
+            if self.csv is None:
+                self.csv = csv.DictWriter(self.fp, fieldnames=list(self.buffer[0]))
+                self.csv.writeheader()
+            self.csv.writerows(self.buffer)
+        self.buffer.clear()
+        self.fp.flush()
+
+    def close(self):
+        if self.fp.closed:
+            return
+        self.flush()
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,45 @@
+"""
+Opt-in tick profiling shared by the simulations.
+
+Profiler splits each tick into named phases with lap() and keeps named
+counters next to them (nodes expanded, draw calls, cache hits, ...);
+print_summary() reports both at the end of a run.
+"""
+
+import time
+from collections import Counter, defaultdict
+
+
+class Profiler:
+    """Per-phase wall-clock timers and counters for one run.
+
+    lap(name) charges the time since the previous lap (or start()) to name,
+    so a tick can be split into phases without re-indenting it.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.counts = Counter()
+        self.ticks = 0
+        self._mark = 0.0
+
+    def start(self):
+        self._mark = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.seconds[name] += now - self._mark
+        self._mark = now
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def print_summary(self):
+        total = sum(self.seconds.values())
+        ticks = max(1, self.ticks)
+        print(f"Profile ({self.ticks} ticks, {total * 1000:.1f} ms timed):")
+        for name, sec in sorted(self.seconds.items(), key=lambda kv: -kv[1]):
+            share = 100 * sec / total if total else 0.0
+            print(f"  {name:<10} {sec * 1000:9.2f} ms  {sec * 1e6 / ticks:9.1f} us/tick  {share:5.1f}%")
+        for name, n in sorted(self.counts.items()):
+            print(f"  {name:<20} {n}")
@@ -0,0 +1,96 @@
+"""
+Planner benchmark for test_collision.py
+
+Times the old BFS (a full path copy in every queue entry, consumed with
+list.pop(0)) against bfs_path (predecessor map, deque cursor) on a large
+generate_maze grid, then compares nodes expanded by bfs_path and
+astar_path. No window is opened.
+
+How to run:
+    python benchmark_planning.py [rows cols]
+"""
+
+import sys
+import time
+from collections import Counter, deque
+
+from test_collision import Maze, astar_path, bfs_path, neighbors
+
+ROWS, COLS = 201, 301
+REPEATS = 3
+
+
+def bfs_path_copying(maze, start, goal):
+    # The planner as it used to be, kept here only as the baseline
+    q = deque()
+    q.append((start, []))
+    seen = {start}
+    while q:
+        cur, path = q.popleft()
+        if cur == goal:
+            return path
+        for nb in neighbors(cur):
+            if nb in seen: continue
+            if maze.is_wall(nb): continue
+            seen.add(nb)
+            q.append((nb, path + [nb]))
+    return None
+
+
+def consume_list(path):
+    path = list(path)
+    while path:
+        path.pop(0)
+
+
+def consume_deque(path):
+    path = deque(path)
+    while path:
+        path.popleft()
+
+
+def best_time(fn, *args):
+    best = float('inf')
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    rows, cols = ROWS, COLS
+    if len(sys.argv) == 3:
+        rows, cols = int(sys.argv[1]), int(sys.argv[2])
+    maze = Maze(rows, cols, use_field=False)
+    start, goal = (1, 1), (rows-2, cols-2)
+
+    old = bfs_path_copying(maze, start, goal)
+    new = bfs_path(maze, start, goal)
+    assert old is not None and list(new) == old, "planners disagree"
+
+    print(f"Grid {rows}x{cols}, path length {len(new)}, best of {REPEATS}")
+    rows_out = [
+        ("search", best_time(bfs_path_copying, maze, start, goal), best_time(bfs_path, maze, start, goal)),
+        ("consume", best_time(consume_list, old), best_time(consume_deque, new)),
+    ]
+    for name, t_old, t_new in rows_out:
+        print(f"{name:8s} copying/list: {t_old*1000:9.2f} ms   "
+              f"predecessor/deque: {t_new*1000:9.2f} ms   x{t_old/t_new:.1f}")
+
+    # Single-target search: BFS vs A*, far corner and a nearby goal
+    print()
+    for label, target in (("far", goal), ("near", (start[0]+10, start[1]+10))):
+        bfs_stats, astar_stats = Counter(), Counter()
+        a = astar_path(maze, start, target, astar_stats)
+        b = bfs_path(maze, start, target, bfs_stats)
+        assert len(a) == len(b), "A* path is not shortest"
+        t_bfs = best_time(bfs_path, maze, start, target)
+        t_astar = best_time(astar_path, maze, start, target)
+        print(f"{label:5s} goal {target}: expanded bfs {bfs_stats['expanded']:6d}  "
+              f"astar {astar_stats['expanded']:6d}   "
+              f"time bfs {t_bfs*1000:7.2f} ms  astar {t_astar*1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
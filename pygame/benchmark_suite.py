@@ -0,0 +1,106 @@
+"""
+Scaling benchmarks for test_collision.py
+
+Times generate_maze, one planning round of Agent.plan_move (pellet
+field and A*) and 20 ticks of CorridorLockManager.request/release over a
+range of grid sizes and agent counts, plus the wall layer of maze.py
+drawn with pygame. Rendering runs headless on the SDL dummy driver; the
+turtle window of test_collision.py is never opened.
+
+Results are printed and appended to a JSON lines file by the shared
+benchharness.py (see there for the format).
+
+How to run:
+    python benchmark_suite.py [--quick] [--only NAME] [--repeats N] [--out FILE]
+"""
+
+import importlib.util
+import os
+import random
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from test_collision import Agent, CorridorLockManager, Maze, generate_maze
+from benchharness import main, measure  # test_collision put the root on sys.path
+
+SIZES = [(21, 31), (101, 151), (201, 301)]  # (rows, cols)
+AGENT_COUNTS = [3, 30, 300]
+SHARED_CELLS = [10, 100, 1000]
+LOCK_TICKS, LOCK_HOLD = 20, 5
+
+
+def bench_generate(rows, cols, repeats):
+    return measure(lambda _: generate_maze(rows, cols), repeats=repeats)
+
+
+def bench_plan(rows, cols, agents, use_field, repeats):
+    maze = Maze(rows, cols, use_field=use_field)
+    rng = random.Random(0)
+    open_cells = [(r, c) for r in range(rows) for c in range(cols) if maze.grid[r][c] != 1]
+    starts = rng.sample(open_cells, agents)
+    lock_mgr = CorridorLockManager(rng=random.Random(0))
+
+    def setup():
+        # Fresh agents, so the A* planner starts every repeat with no path
+        return [Agent(i, pos, 'red', maze, lock_mgr, rng=random.Random(i)) for i, pos in enumerate(starts)]
+
+    def run(agents):
+        for a in agents:
+            a.plan_move()
+    return measure(run, setup, repeats)
+
+
+def bench_locks(agents, cells, repeats):
+    # Every agent asks for one of the shared cells each tick, retrying while
+    # it waits; owners hold their cell for LOCK_HOLD ticks, then let go
+    rng = random.Random(0)
+    wanted = [((0, rng.randrange(cells)), rng.randrange(100)) for _ in range(agents)]
+
+    def run(mgr):
+        for tick in range(LOCK_TICKS):
+            for aid, (cell, score) in enumerate(wanted):
+                mgr.request(cell, aid, score)
+            if tick % LOCK_HOLD == LOCK_HOLD - 1:
+                for cell, owner in list(mgr.owner.items()):
+                    mgr.release(cell, owner)
+    return measure(run, lambda: CorridorLockManager(rng=random.Random(0)), repeats)
+
+
+def bench_render(repeats):
+    import pygame
+    from maze import Maze as WallMaze
+    screen = pygame.display.set_mode((800, 800))
+    walls = WallMaze(screen)
+    background = pygame.Surface(screen.get_size())
+
+    def run(_):
+        background.fill((0, 0, 0))
+        walls.draw_maze(background)
+        screen.blit(background, (0, 0))
+        pygame.display.update()
+    best, mean = measure(run, repeats=repeats)
+    pygame.quit()
+    return best, mean
+
+
+def cases(quick):
+    sizes = SIZES[:1] if quick else SIZES
+    agent_counts = AGENT_COUNTS[:1] if quick else AGENT_COUNTS
+    for rows, cols in sizes:
+        p = {'rows': rows, 'cols': cols}
+        yield 'generate_maze', p, lambda n, r=rows, c=cols: bench_generate(r, c, n)
+        for agents in agent_counts:
+            for planner, use_field in (('field', True), ('astar', False)):
+                yield ('plan_move', dict(p, agents=agents, planner=planner),
+                       lambda n, r=rows, c=cols, a=agents, f=use_field: bench_plan(r, c, a, f, n))
+    for cells in (SHARED_CELLS[:1] if quick else SHARED_CELLS):
+        for agents in agent_counts:
+            yield ('lock_request_release', {'cells': cells, 'agents': agents * 10},
+                   lambda n, c=cells, a=agents * 10: bench_locks(a, c, n))
+    if importlib.util.find_spec('pygame') is not None:
+        yield 'render_walls', {'width': 800, 'height': 800}, bench_render
+
+
+if __name__ == '__main__':
+    main('pygame', cases, 'Scaling benchmarks for test_collision.py.', os.path.dirname(os.path.abspath(__file__)))
@@ -1,7 +1,12 @@
 import pygame
+
+import rootpath  # puts the repository root on sys.path
+import mazefile
 from maze import Maze
 from my_agents import Agents
 
+MAZE_PATH = None  # e.g. 'level.pmaz' to load a maze file instead of maze_layout
+
 # pygame setup
 pygame.init()
 screen = pygame.display.set_mode((800, 800))
@@ -13,7 +18,7 @@ screen_width, screen_height = screen.get_size()
 VEL = 3  # base velocity
 
 # create maze + agent
-maze = Maze(screen)
+maze = Maze(screen, mazefile.MazeFile(MAZE_PATH) if MAZE_PATH else None)
 AGENT1 = Agents(screen, color=(144, 177, 0), name="AGENT1")
 AGENT1_cord = pygame.Rect(80, 80, 40, 40)  # bigger rect for circle center
 
@@ -22,11 +27,21 @@ VEL_X = VEL
 VEL_Y = 0
 
 
-def draw_lines():
+def draw_lines(surface):
     for x in range(0, screen_height, 50):
-        pygame.draw.line(screen, (50, 50, 50), (0, x), (screen_width, x), 1)
+        pygame.draw.line(surface, (50, 50, 50), (0, x), (screen_width, x), 1)
     for y in range(0, screen_width, 50):
-        pygame.draw.line(screen, (50, 50, 50), (y, 0), (y, screen_height), 1)
+        pygame.draw.line(surface, (50, 50, 50), (y, 0), (y, screen_height), 1)
+
+
+# static layer (grid lines + walls) is drawn once and reused every frame
+background = pygame.Surface((screen_width, screen_height))
+background.fill((0, 0, 0))
+draw_lines(background)
+maze.draw_maze(background)
+screen.blit(background, (0, 0))
+pygame.display.update()
+agent_drawn = None  # screen area the agent covered last frame
 
 
 while running:
@@ -36,18 +51,18 @@ while running:
         if event.type == pygame.QUIT:
             running = False
 
-    screen.fill((0, 0, 0))
-    draw_lines()
-
-    # draw maze
-    maze.draw_maze()
+    # erase the agent by restoring the background under it
+    dirty_rects = []
+    if agent_drawn is not None:
+        screen.blit(background, agent_drawn, agent_drawn)
+        dirty_rects.append(agent_drawn)
 
     # move agent
     AGENT1_cord.x += VEL_X
     AGENT1_cord.y += VEL_Y
 
-    # check collisions
-    for wall in maze.walls:
+    # check collisions against the walls under the agent only
+    for wall in maze.walls_near(AGENT1_cord):
         if AGENT1_cord.colliderect(wall):
             # push back
             if VEL_X > 0:  
@@ -69,8 +84,10 @@ while running:
             break
 
     # draw agent (circle centered in rect)
-    AGENT1.draw_circle(AGENT1_cord.centerx, AGENT1_cord.centery)
+    agent_drawn = AGENT1.draw_circle(AGENT1_cord.centerx, AGENT1_cord.centery)
+    dirty_rects.append(agent_drawn)
 
-    pygame.display.update()
+    # only push the changed areas to the display
+    pygame.display.update(dirty_rects)
 
 pygame.quit()
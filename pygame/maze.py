@@ -1,5 +1,8 @@
 import pygame
 
+import rootpath  # puts the repository root on sys.path
+import mazefile
+
 pygame.init()
 CELL_SIZE = 50
 """
@@ -24,17 +27,28 @@ maze_layout = [
     "################"
 ]
 
+# layout characters for mazefile WALL, OPEN, SHARED
+LAYOUT_CODES = ("#", ".", ".")
+
+def save_layout(path, layout=maze_layout):
+    # Write a layout to a maze file; every "." cell gets a pellet
+    kinds = ([LAYOUT_CODES.index(ch) for ch in row] for row in layout)
+    mazefile.write_maze(path, len(layout), len(layout[0]), kinds)
+
 class Maze:
-    def __init__(self, screen):
+    def __init__(self, screen, maze_file=None):
         self.screen = screen
+        # a mapped mazefile.MazeFile reads like the layout strings
+        layout = maze_file.view(LAYOUT_CODES) if maze_file is not None else maze_layout
         self.walls = []  # store wall rectangles
+        self.wall_tiles = {}  # uniform grid of CELL_SIZE tiles over the walls
 
         # Build wall list from layout
         """
         first loop is iterating the first index to the list item
         second loop is iterating all item in the first loop
         """
-        for row_idx, row in enumerate(maze_layout):
+        for row_idx, row in enumerate(layout):
             for col_idx, cell in enumerate(row):
                 if cell == "#":
                     """
@@ -52,9 +66,30 @@ class Maze:
                                        CELL_SIZE)
                     #store all coordinates in wall list variable
                     self.walls.append(rect)
-    
-    def draw_maze(self):
-        # Draw all walls
+                    # spatial index: (col, row) tile -> wall rect
+                    self.wall_tiles[(col_idx, row_idx)] = rect
+
+    def walls_near(self, rect):
+        """
+        Walls on the tiles a rect overlaps (usually 1-4), in the same
+        row-major order as self.walls, instead of scanning every wall.
+        """
+        first_col, last_col = rect.left // CELL_SIZE, (rect.right - 1) // CELL_SIZE
+        first_row, last_row = rect.top // CELL_SIZE, (rect.bottom - 1) // CELL_SIZE
+        near = []
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                wall = self.wall_tiles.get((col, row))
+                if wall is not None:
+                    near.append(wall)
+        return near
+
+    def collides(self, rect):
+        return any(rect.colliderect(w) for w in self.walls_near(rect))
+
+    def draw_maze(self, surface=None):
+        # Draw all walls (onto the screen unless another surface is given)
+        surface = surface or self.screen
         for wall in self.walls:
-            pygame.draw.rect(self.screen, (111, 111, 111), wall)  
+            pygame.draw.rect(surface, (111, 111, 111), wall)
 
@@ -12,4 +12,4 @@ class Agents():
         self.color = color
         self.radius = 20
     def draw_circle(self,x_cor,y_cor):
-        pygame.draw.circle(self.screen, (self.color), (x_cor,y_cor) , self.radius)
+        return pygame.draw.circle(self.screen, (self.color), (x_cor,y_cor) , self.radius)
@@ -0,0 +1,14 @@
+"""
+Put the repository root on sys.path.
+
+mazefile, mazecache and the other modules shared by every frontend live
+at the root, but this frontend runs as scripts from its own folder.
+Import this before any of them.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
@@ -22,8 +22,22 @@ Note: This is an educational, extensible prototype not an optimized game engine.
 """
 
 import turtle
+import cProfile
+import heapq
+import pstats
 import random
-from collections import deque, defaultdict
+from collections import Counter, deque, defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # the uint8 grid is an optional accelerator
+    np = None
+
+import rootpath  # puts the repository root on sys.path
+import mazecache
+import mazefile
+from metrics import MetricsSink
+from profiler import Profiler
 
 # === Configuration ===
 CELL = 24  # pixels
@@ -32,6 +46,14 @@ SCREEN_WIDTH = COLS * CELL
 SCREEN_HEIGHT = ROWS * CELL
 FPS = 8  # ticks per second
 MAX_TICKS = 2000
+SEED = None  # set an int to repeat a run exactly (the seed is printed at the end)
+METRICS_PATH = None  # e.g. 'ticks.csv' or 'ticks.ndjson' to stream per-tick metrics
+PROFILE = False  # time each tick phase and print a summary at the end
+CPROFILE_PATH = None  # e.g. 'sim.prof' to run under cProfile and dump the stats
+MAZE_PATH = None  # e.g. 'level.pmaz' to play on a maze file (see save_maze)
+CACHE_DIR = None  # e.g. mazecache.DEFAULT_DIR to reuse the pellet field across runs
+CACHE_VERSION = 1  # bump when the cached pellet field changes shape
+PLANNER = 'field'  # or 'astar' (see Simulation)
 
 # Colors
 BACKGROUND = "black"
@@ -81,21 +103,132 @@ def generate_maze(rows, cols):
 
     return grid
 
+# Grid values for mazefile WALL, OPEN, SHARED
+MAZE_CODES = (1, 0, 2)
+
+def save_maze(maze, path):
+    # Write a Maze's layout, pellets and power pellets to a maze file
+    kinds = ([MAZE_CODES.index(v) for v in row] for row in maze.grid)
+    mazefile.write_maze(path, maze.rows, maze.cols, kinds, pellets=maze.pellets, power=maze.power_pellets)
+
+def use_maze_file(path):
+    # Open a maze file and size the window and agent starts to it
+    global ROWS, COLS, SCREEN_WIDTH, SCREEN_HEIGHT, START_POS
+    mf = mazefile.MazeFile(path)
+    ROWS, COLS = mf.rows, mf.cols
+    SCREEN_WIDTH, SCREEN_HEIGHT = COLS * CELL, ROWS * CELL
+    # Starts keep their corners, moved to the nearest open cell
+    try:
+        START_POS = [mf.nearest_open(r, c) for r, c in [(1, 1), (ROWS-2, 1), (1, COLS-2)]]
+    except ValueError:
+        mf.close()
+        raise ValueError(f'{path} has no open cell to start on')
+    return mf
+
 def neighbors(pos):
     r, c = pos
     return [(r-1, c), (r+1, c), (r, c-1), (r, c+1)]
 
-# === Visualization ===
+# Same order as neighbors(), for batched expansion
+NEIGHBOR_OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BATCH_MIN = 64  # smaller queries use the per-cell loop; NumPy's fixed cost outweighs them
+
+def _walk_back(prev, start, cur):
+    path = deque()
+    while cur != start:
+        path.appendleft(cur)
+        cur = prev[cur]
+    return path
+
+def _count(stats, expanded):
+    if stats is not None:
+        stats['searches'] += 1
+        stats['expanded'] += expanded
+
+def bfs_path(maze, start, goal, stats=None):
+    """Shortest path start -> goal as a deque of cells (start excluded), or None.
+
+    Each cell stores only its predecessor; the path is walked back once
+    the goal is reached instead of copying a list into every queue entry.
+    Pass a Counter as stats to accumulate 'searches' and 'expanded' nodes.
+    """
+    prev = {start: None}
+    q = deque([start])
+    expanded = 0
+    while q:
+        cur = q.popleft()
+        expanded += 1
+        if cur == goal:
+            _count(stats, expanded)
+            return _walk_back(prev, start, cur)
+        for nb in neighbors(cur):
+            if nb in prev: continue
+            if maze.is_wall(nb): continue
+            prev[nb] = cur
+            q.append(nb)
+    _count(stats, expanded)
+    return None
+
+def astar_path(maze, start, goal, stats=None):
+    """A* version of bfs_path: Manhattan heuristic, binary heap, stops at the goal.
+
+    Returns the same deque (or None) and fills stats the same way, so the
+    two can be compared node for node.
+    """
+    def h(p):
+        return abs(p[0]-goal[0]) + abs(p[1]-goal[1])
+    g = {start: 0}
+    prev = {start: None}
+    # (f, -g, cell): among equal f, expand the node nearest the goal first
+    heap = [(h(start), 0, start)]
+    expanded = 0
+    while heap:
+        _, neg_g, cur = heapq.heappop(heap)
+        if -neg_g > g[cur]:
+            continue  # stale entry
+        expanded += 1
+        if cur == goal:
+            _count(stats, expanded)
+            return _walk_back(prev, start, cur)
+        ng = -neg_g + 1
+        for nb in neighbors(cur):
+            if maze.is_wall(nb): continue
+            if ng < g.get(nb, float('inf')):
+                g[nb] = ng
+                prev[nb] = cur
+                heapq.heappush(heap, (ng + h(nb), -ng, nb))
+    _count(stats, expanded)
+    return None
 
-screen = turtle.Screen()
-screen.setup(width=SCREEN_WIDTH+50, height=SCREEN_HEIGHT+50)
-screen.title("Multi-Agent Pac-Men - Turtle")
-screen.bgcolor(BACKGROUND)
-screen.tracer(0, 0)
+# === Visualization ===
 
-pen = turtle.Turtle()
-pen.hideturtle()
-pen.penup()
+# Created by setup_screen() so the maze and planners import without a display
+screen = None
+pen = None    # static layer: walls and shared cells, drawn once
+dots = None   # stamps one pellet per item so an eaten pellet can be deleted alone
+hud = None    # the only thing cleared and rewritten every tick
+
+def setup_screen():
+    global screen, pen, dots, hud
+    screen = turtle.Screen()
+    screen.setup(width=SCREEN_WIDTH+50, height=SCREEN_HEIGHT+50)
+    screen.title("Multi-Agent Pac-Men - Turtle")
+    screen.bgcolor(BACKGROUND)
+    screen.tracer(0, 0)
+
+    pen = turtle.Turtle()
+    pen.hideturtle()
+    pen.penup()
+
+    dots = turtle.Turtle()
+    dots.hideturtle()
+    dots.penup()
+    dots.shape('circle')
+
+    hud = turtle.Turtle()
+    hud.hideturtle()
+    hud.penup()
+    hud.color('white')
 
 def to_pixel(pos):
     r, c = pos
@@ -103,18 +236,144 @@ def to_pixel(pos):
     y = SCREEN_HEIGHT/2 - r*CELL - CELL/2
     return x, y
 
+# === Nearest-pellet distance map ===
+
+class PelletField:
+    """Path distance from each open cell to the nearest remaining pellet.
+
+    Built with one multi-source BFS from every pellet. Each cell remembers
+    which pellet it is closest to, so eating a pellet only resets and
+    re-floods that pellet's catchment instead of the whole grid.
+    """
+
+    def __init__(self, grid, pellets):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.dist = {}
+        self.owner = {}
+        self.expanded = 0  # cells popped across the initial flood and every repair
+        self._flood([(0, p, p) for p in pellets])
+
+    def to_state(self):
+        # Plain dicts for the precompute cache (see mazecache.py); the grid
+        # belongs to the Maze and is passed back in to from_state()
+        state = dict(vars(self))
+        del state['grid']
+        return state
+
+    @classmethod
+    def from_state(cls, grid, state):
+        field = cls.__new__(cls)
+        vars(field).update(state, grid=grid)
+        return field
+
+    def _open(self, pos):
+        r, c = pos
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.grid[r][c] != 1
+
+    def _flood(self, seeds, region=None):
+        dist, owner = self.dist, self.owner
+        heap = list(seeds)
+        heapq.heapify(heap)
+        for d, cell, src in heap:
+            dist[cell] = d
+            owner[cell] = src
+        while heap:
+            d, cell, src = heapq.heappop(heap)
+            if d > dist[cell]:
+                continue
+            self.expanded += 1
+            for nb in neighbors(cell):
+                if region is not None and nb not in region:
+                    continue
+                if region is None and not self._open(nb):
+                    continue
+                if d + 1 < dist.get(nb, float('inf')):
+                    dist[nb] = d + 1
+                    owner[nb] = src
+                    heapq.heappush(heap, (d + 1, nb, src))
+
+    def remove(self, pellet):
+        if self.owner.get(pellet) != pellet:
+            return
+        # Catchment of the eaten pellet: connected through its own BFS tree
+        region = {pellet}
+        stack = [pellet]
+        while stack:
+            cell = stack.pop()
+            for nb in neighbors(cell):
+                if nb not in region and self.owner.get(nb) == pellet:
+                    region.add(nb)
+                    stack.append(nb)
+        for cell in region:
+            del self.dist[cell]
+            del self.owner[cell]
+        seeds = []
+        for cell in region:
+            border = [(self.dist[nb], self.owner[nb]) for nb in neighbors(cell) if nb in self.dist]
+            if border:
+                d, src = min(border)
+                seeds.append((d + 1, cell, src))
+        # Cells nobody can reach any more simply stay out of the map
+        self._flood(seeds, region)
+
+    def next_step(self, pos):
+        """Neighbour of pos that is one step closer to the nearest pellet, or None."""
+        best, bestd = None, float('inf')
+        for nb in neighbors(pos):
+            d = self.dist.get(nb)
+            if d is not None and d < bestd:
+                best, bestd = nb, d
+        return best
+
 # === Maze class ===
 class Maze:
-    def __init__(self, rows, cols):
-        self.rows = rows
-        self.cols = cols
-        self.grid = generate_maze(rows, cols)
-        self.pellets = set()
-        for r in range(rows):
-            for c in range(cols):
-                if self.grid[r][c] == 0:
-                    self.pellets.add((r, c))
-        self.power_pellets = {(1,1), (1,cols-2), (rows-2,1), (rows-2,cols-2)}
+    def __init__(self, rows, cols, use_field=True, maze_file=None, cache=None):
+        if maze_file is not None:
+            # Everything comes from the mapped file, the grid decoded in one pass (see use_maze_file)
+            self.rows, self.cols = maze_file.rows, maze_file.cols
+            self.grid = maze_file.grid(MAZE_CODES)
+            self.pellets = set(maze_file.cells(maze_file.pellets))
+            self.power_pellets = set(maze_file.cells(maze_file.power))
+            kinds = maze_file.kinds_array()
+            self.array = np.array(MAZE_CODES, dtype=np.uint8)[kinds] if kinds is not None else None
+        else:
+            self.rows = rows
+            self.cols = cols
+            self.grid = generate_maze(rows, cols)
+            self.pellets = set()
+            for r in range(rows):
+                for c in range(cols):
+                    if self.grid[r][c] == 0:
+                        self.pellets.add((r, c))
+            self.power_pellets = {(1,1), (1,cols-2), (rows-2,1), (rows-2,cols-2)}
+            # uint8 copy of grid (0 open, 1 wall, 2 shared) for batched queries
+            self.array = np.array(self.grid, dtype=np.uint8) if np is not None else None
+        self.field = None
+        if use_field and cache is not None:
+            # Keyed by the layout and the starting pellets (see mazecache.py),
+            # the same for a generated maze and its save_maze() copy
+            if maze_file is not None:
+                key = maze_file.digest()
+            else:
+                kinds = ([MAZE_CODES.index(v) for v in row] for row in self.grid)
+                key = mazefile.layout_digest(rows, cols, kinds, self.pellets, self.power_pellets)
+            key = mazecache.content_key(f'test_collision.py v{CACHE_VERSION}', key)
+            state = cache.cached(key, 'pellet_field', lambda: PelletField(self.grid, self.pellets).to_state())
+            self.field = PelletField.from_state(self.grid, state)
+        elif use_field:
+            self.field = PelletField(self.grid, self.pellets)
+        self.pellet_stamps = None  # pos -> turtle stamp id, set on first draw()
+        self.search_stats = Counter()  # path searches run / nodes expanded on this maze
+
+    def eat_pellet(self, pos):
+        if pos in self.pellets:
+            self.pellets.remove(pos)
+            if self.field is not None:
+                self.field.remove(pos)
+            return True
+        return False
 
     def is_wall(self, pos):
         r, c = pos
@@ -128,140 +387,230 @@ class Maze:
             return False
         return self.grid[r][c] == 2
 
+    def _cell_values(self, cells, outside):
+        # Look up many (r, c) cells at once; out-of-range cells read as `outside`
+        cells = np.asarray(cells, dtype=np.intp).reshape(-1, 2)
+        r, c = cells[:, 0], cells[:, 1]
+        inside = (r >= 0) & (r < self.rows) & (c >= 0) & (c < self.cols)
+        values = np.full(len(cells), outside, dtype=np.uint8)
+        values[inside] = self.array[r[inside], c[inside]]
+        return values
+
+    def walkable_mask(self, cells):
+        """Batched `not is_wall` for a sequence of (r, c) cells."""
+        if self.array is None:
+            return [not self.is_wall(p) for p in cells]
+        return self._cell_values(cells, 1) != 1
+
+    def open_neighbors(self, positions):
+        """Walkable neighbours of every position, in neighbors() order, in one query."""
+        if self.array is None or len(positions) < BATCH_MIN:
+            return [[nb for nb in neighbors(p) if not self.is_wall(nb)] for p in positions]
+        cand = np.asarray(positions, dtype=np.intp).reshape(-1, 1, 2) + np.array(NEIGHBOR_OFFSETS)
+        mask = self.walkable_mask(cand.reshape(-1, 2)).reshape(-1, 4)
+        return [
+            [tuple(nb) for nb, ok in zip(row, ok_row) if ok]
+            for row, ok_row in zip(cand.tolist(), mask.tolist())
+        ]
+
     def draw(self):
+        """Retained-mode draw: walls once, then only delete stamps of eaten pellets.
+
+        Returns the number of turtle draw calls issued.
+        """
+        if self.pellet_stamps is None:
+            return self.draw_static()
+        eaten = [p for p in self.pellet_stamps if p not in self.pellets]
+        for pos in eaten:
+            dots.clearstamp(self.pellet_stamps.pop(pos))
+        return len(eaten)
+
+    def draw_static(self):
         pen.clear()
+        calls = 1
         for r in range(self.rows):
             for c in range(self.cols):
-                x, y = to_pixel((r, c))
                 cell_type = self.grid[r][c]
-                pen.goto(x - CELL/2, y - CELL/2)
                 if cell_type == 1:
                     pen.fillcolor(WALL_COLOR)
-                    pen.begin_fill()
-                    for _ in range(4):
-                        pen.forward(CELL)
-                        pen.left(90)
-                    pen.end_fill()
                 elif cell_type == 2:
                     pen.fillcolor(SHARED_ROUTE_COLOR)
-                    pen.begin_fill()
-                    for _ in range(4):
-                        pen.forward(CELL)
-                        pen.left(90)
-                    pen.end_fill()
-                if (r, c) in self.pellets:
-                    pen.goto(x, y-4)
-                    pen.dot(4, PELLET_COLOR)
-                if (r, c) in self.power_pellets:
-                    pen.goto(x, y)
-                    pen.dot(8, POWER_PELLET_COLOR)
+                else:
+                    continue
+                x, y = to_pixel((r, c))
+                pen.goto(x - CELL/2, y - CELL/2)
+                pen.begin_fill()
+                for _ in range(4):
+                    pen.forward(CELL)
+                    pen.left(90)
+                pen.end_fill()
+                calls += 1
+        # Power pellets are never removed, so they are static too
+        dots.color(POWER_PELLET_COLOR)
+        dots.shapesize(8/20)
+        for pos in self.power_pellets:
+            dots.goto(*to_pixel(pos))
+            dots.stamp()
+        dots.color(PELLET_COLOR)
+        dots.shapesize(4/20)
+        self.pellet_stamps = {}
+        for pos in self.pellets:
+            x, y = to_pixel(pos)
+            dots.goto(x, y-4)
+            self.pellet_stamps[pos] = dots.stamp()
+        return calls + len(self.power_pellets) + len(self.pellets)
+
+def make_sprite(color):
+    sprite = turtle.Turtle()
+    sprite.shape('circle')
+    sprite.shapesize(0.9)
+    sprite.penup()
+    sprite.color('black', color)
+    return sprite
 
 # === Corridor Lock Manager ===
 class CorridorLockManager:
-    def __init__(self):
+    """Hands out shared corridor cells one agent at a time.
+
+    A request for a held cell queues the agent on that cell's heap,
+    ordered by score with a random tie-break drawn when it is queued; an
+    agent retrying every tick stays queued once. release() gives the cell
+    to the best waiter and drops the others, who ask again next tick.
+    Cells whose owner left without handing over while agents still wait
+    are indexed in `orphans` for force_arbitrate(). drop_out() takes a
+    dead agent out of every queue, so a cell is never handed to it.
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()  # tie-break draws
         self.owner = {}
-        self.queue = defaultdict(deque)
+        self.heaps = {}    # cell -> heap of (-score, tie-break, agent id)
+        self.waiting = {}  # cell -> {agent id: score} for the live heap entries
+        self.orphans = set()  # unowned cells that still have waiters
         self.conflicts = 0
         self.successful_negotiations = 0
 
     def request(self, cell, agent_id, agent_score):
-        if cell not in self.owner:
+        owner = self.owner.get(cell)
+        if owner is None:
             self.owner[cell] = agent_id
+            self.orphans.discard(cell)
             self.successful_negotiations += 1
             return True
-        else:
-            self.queue[cell].append((agent_id, agent_score))
-            self.conflicts += 1
-            return False
-
-    def release(self, cell, agent_id):
-        if self.owner.get(cell) == agent_id:
-            del self.owner[cell]
-            if self.queue[cell]:
-                contenders = list(self.queue[cell])
-                self.queue[cell].clear()
-                contenders.sort(key=lambda x: x[1], reverse=True)
-                best_score = contenders[0][1]
-                top = [a for a, s in contenders if s == best_score]
-                winner = random.choice(top)
-                self.owner[cell] = winner
-                self.successful_negotiations += 1
+        if owner == agent_id:  # granted on a release while it was waiting
             return True
+        waiting = self.waiting.setdefault(cell, {})
+        if waiting.get(agent_id) != agent_score:
+            # A changed score leaves the old entry behind; _pop_best skips it
+            waiting[agent_id] = agent_score
+            heapq.heappush(self.heaps.setdefault(cell, []), (-agent_score, self.rng.random(), agent_id))
+        self.conflicts += 1
         return False
 
+    def _pop_best(self, cell):
+        heap = self.heaps.get(cell)
+        waiting = self.waiting.get(cell)
+        while heap:
+            neg_score, _, agent_id = heapq.heappop(heap)
+            if waiting.get(agent_id) == -neg_score:
+                del waiting[agent_id]
+                return agent_id
+        return None
+
+    def release(self, cell, agent_id):
+        if self.owner.get(cell) != agent_id:
+            return False
+        del self.owner[cell]
+        winner = self._pop_best(cell)
+        self.heaps.pop(cell, None)
+        self.waiting.pop(cell, None)
+        if winner is not None:
+            self.owner[cell] = winner
+            self.successful_negotiations += 1
+        return True
+
+    def abandon(self, cell, agent_id):
+        # The owner drops out without handing the cell over
+        if self.owner.get(cell) != agent_id:
+            return False
+        del self.owner[cell]
+        if self.waiting.get(cell):
+            self.orphans.add(cell)
+        return True
+
+    def drop_out(self, agent_id):
+        # A dead agent leaves every queue (its heap entries go stale and
+        # _pop_best skips them) and gives up every cell it owns, including
+        # one granted on a release that it never got to step onto
+        for cell, waiting in list(self.waiting.items()):
+            if waiting.pop(agent_id, None) is not None and not waiting:
+                del self.waiting[cell]
+                self.heaps.pop(cell, None)
+                self.orphans.discard(cell)
+        for cell in [c for c, owner in self.owner.items() if owner == agent_id]:
+            self.abandon(cell, agent_id)
+
     def force_arbitrate(self, cell):
-        if cell not in self.owner and self.queue[cell]:
-            agent, _ = self.queue[cell].popleft()
+        self.orphans.discard(cell)
+        if cell in self.owner:
+            return None
+        agent = self._pop_best(cell)
+        if agent is not None:
             self.owner[cell] = agent
-            return agent
-        return None
+        return agent
 
 # === Agent class ===
 class Agent:
-    def __init__(self, aid, start_pos, color, maze, lock_mgr):
+    # Fixed attribute layout; the turtle that draws an agent lives in
+    # Simulation.sprites so headless agents carry no Tk objects at all
+    __slots__ = ('id', 'pos', 'color', 'maze', 'lock_mgr', 'rng', 'score', 'energy',
+                 'wait_time', 'access_count', 'alive', 'path')
+
+    def __init__(self, aid, start_pos, color, maze, lock_mgr, rng=None):
         self.id = aid
+        self.rng = rng if rng is not None else random.Random()
         self.pos = start_pos
         self.color = color
         self.maze = maze
         self.lock_mgr = lock_mgr
-        self.turtle = turtle.Turtle()
-        self.turtle.shape('circle')
-        self.turtle.shapesize(0.9)
-        self.turtle.penup()
-        self.turtle.color('black', color)
-        self.update_turtle()
 
         self.score = INITIAL_SCORE
         self.energy = INITIAL_ENERGY
         self.wait_time = 0
         self.access_count = 0
         self.alive = True
-        self.path = []
-
-    def update_turtle(self):
-        x, y = to_pixel(self.pos)
-        self.turtle.goto(x, y)
+        self.path = deque()
 
     def sense(self):
-        cand = []
-        for n in neighbors(self.pos):
-            if not self.maze.is_wall(n):
-                cand.append(n)
-        return cand
+        return [n for n in neighbors(self.pos) if not self.maze.is_wall(n)]
 
     def plan_move(self):
         if not self.maze.pellets:
             return self.pos
+        if self.maze.field is not None:
+            nxt = self.maze.field.next_step(self.pos)
+            return nxt if nxt is not None else self.pos
         if self.path:
-            nxt = self.path.pop(0)
-            return nxt
+            return self.path.popleft()
+        # Nearest pellet as the crow flies, not counting one under the agent
+        # (its spawn cell's pellet is never eaten, so it would pick it forever)
         best = None
         bestd = 1e9
         for p in self.maze.pellets:
             d = abs(p[0]-self.pos[0]) + abs(p[1]-self.pos[1])
-            if d < bestd:
+            if 0 < d < bestd:
                 bestd = d
                 best = p
-        from collections import deque
-        q = deque()
-        q.append((self.pos, []))
-        seen = {self.pos}
-        while q:
-            cur, path = q.popleft()
-            if cur == best:
-                self.path = path[1:] if len(path) > 0 else []
-                if self.path:
-                    return self.path.pop(0)
-                else:
-                    return self.pos
-            for nb in neighbors(cur):
-                if nb in seen: continue
-                if self.maze.is_wall(nb): continue
-                seen.add(nb)
-                q.append((nb, path + [nb]))
+        path = astar_path(self.maze, self.pos, best, self.maze.search_stats) if best is not None else None
+        if path is not None:
+            self.path = path
+            if self.path:
+                return self.path.popleft()
+            return self.pos
+        # Only the fallback needs the neighbours, so they are sensed here
         cands = self.sense()
         if cands:
-            return random.choice(cands)
+            return self.rng.choice(cands)
         return self.pos
 
     def step(self):
@@ -270,8 +619,7 @@ class Agent:
         nxt = self.plan_move()
         if nxt == self.pos:
             self.energy -= 0.1
-            return
-        if self.maze.is_shared(nxt):
+        elif self.maze.is_shared(nxt):
             got = self.lock_mgr.request(nxt, self.id, self.score)
             if got:
                 self.access_count += 1
@@ -283,14 +631,13 @@ class Agent:
             self.move_to(nxt)
         if self.energy <= DROP_ENERGY_THRESHOLD:
             self.alive = False
+            self.lock_mgr.drop_out(self.id)
 
     def move_to(self, nxt):
         if self.maze.is_shared(self.pos):
             self.lock_mgr.release(self.pos, self.id)
         self.pos = nxt
-        self.update_turtle()
-        if self.pos in self.maze.pellets:
-            self.maze.pellets.remove(self.pos)
+        if self.maze.eat_pellet(self.pos):
             self.score += PELLET_VALUE
             self.energy += 1
         if self.pos in self.maze.power_pellets:
@@ -303,13 +650,27 @@ class Agent:
 
 # === Simulation controller ===
 class Simulation:
-    def __init__(self):
-        self.maze = Maze(ROWS, COLS)
-        self.lock_mgr = CorridorLockManager()
+    def __init__(self, seed=None, metrics_sink=None, profiler=None, maze_file=None, cache=None, planner='field'):
+        # One seed drives separate streams for the lock manager and each
+        # agent, so runs repeat exactly and one agent's draws never shift another's
+        self.seed = seed if seed is not None else random.randrange(2**62)
+        self.rng = random.Random(self.seed)
+        # planner: 'field' (PelletField lookup) or 'astar' (A* to the
+        # Manhattan-nearest pellet, following the path until it runs out)
+        if planner not in ('field', 'astar'):
+            raise ValueError(f"unknown planner {planner!r}")
+        self.maze = Maze(ROWS, COLS, use_field=planner == 'field', maze_file=maze_file, cache=cache)
+        self.lock_mgr = CorridorLockManager(rng=random.Random(self.rng.getrandbits(64)))
         self.agents = []
         for i, start in enumerate(START_POS):
-            a = Agent(i, start, AGENT_COLORS[i % len(AGENT_COLORS)], self.maze, self.lock_mgr)
+            a = Agent(i, start, AGENT_COLORS[i % len(AGENT_COLORS)], self.maze, self.lock_mgr,
+                      rng=random.Random(self.rng.getrandbits(64)))
             self.agents.append(a)
+        # Rendering handles, kept out of the agents: agent id -> turtle
+        self.sprites = {}
+        if screen is not None:
+            for a in self.agents:
+                self.sprites[a.id] = make_sprite(a.color)
         self.ticks = 0
         self.metrics = {
             'conflicts': 0,
@@ -317,26 +678,44 @@ class Simulation:
             'wait_times': defaultdict(int),
             'access_counts': defaultdict(int),
         }
+        self.metrics_sink = metrics_sink  # optional MetricsSink, one row per tick
+        self.profiler = profiler  # optional Profiler; phases are only timed when set
         self.running = True
 
     def draw(self):
-        self.maze.draw()
-        pen.goto(-SCREEN_WIDTH/2 + 10, SCREEN_HEIGHT/2 - 12)
-        pen.color('white')
+        calls = self.maze.draw()
+        hud.clear()
+        hud.goto(-SCREEN_WIDTH/2 + 10, SCREEN_HEIGHT/2 - 12)
         info = ' | '.join([f'A{a.id}: S{a.score} E{int(a.energy)} W{a.wait_time}' for a in self.agents])
-        pen.write(info, font=(None, 10, 'normal'))
+        hud.write(info, font=(None, 10, 'normal'))
+        self.draw_agents()
+        if self.profiler is not None:
+            self.profiler.count('draw_calls', calls + 2)
+
+    def draw_agents(self):
+        for a in self.agents:
+            sprite = self.sprites.get(a.id)
+            if sprite is not None:
+                sprite.goto(*to_pixel(a.pos))
+        if self.profiler is not None:
+            self.profiler.count('draw_calls', len(self.sprites))
 
     def step(self):
         if not self.running:
             return
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
         for a in self.agents:
-            if a.alive:
-                a.step()
+            a.step()
+        if prof is not None:
+            prof.lap('agents')
 
         if self.ticks % 30 == 0:
-            for cell, q in list(self.lock_mgr.queue.items()):
-                if cell not in self.lock_mgr.owner and q:
-                    self.lock_mgr.force_arbitrate(cell)
+            for cell in list(self.lock_mgr.orphans):
+                self.lock_mgr.force_arbitrate(cell)
+        if prof is not None:
+            prof.lap('arbitrate')
 
         self.ticks += 1
         self.metrics['conflicts'] = self.lock_mgr.conflicts
@@ -344,13 +723,31 @@ class Simulation:
 
         pellets_left = len(self.maze.pellets)
         alive_agents = [a for a in self.agents if a.alive]
+        if self.metrics_sink is not None:
+            self.metrics_sink.write({
+                'tick': self.ticks,
+                'pellets_left': pellets_left,
+                'conflicts': self.lock_mgr.conflicts,
+                'negotiations': self.lock_mgr.successful_negotiations,
+                'total_wait': sum(a.wait_time for a in self.agents),
+                'alive': len(alive_agents),
+                'mean_energy': round(sum(a.energy for a in alive_agents) / len(alive_agents), 3) if alive_agents else 0.0,
+            })
+        if prof is not None:
+            prof.lap('export')
+            prof.ticks += 1
         if pellets_left == 0 or not alive_agents or self.ticks >= MAX_TICKS:
             self.running = False
             self.finish()
 
     def finish(self):
-        screen.update()
+        if self.metrics_sink is not None:
+            self.metrics_sink.close()
+        if screen is not None:
+            self.draw()
+            screen.update()
         print("--- Simulation finished ---")
+        print(f"Seed: {self.seed}")
         print(f"Ticks: {self.ticks}")
         print(f"Pellets left: {len(self.maze.pellets)}")
         print(f"Conflicts detected: {self.metrics['conflicts']}")
@@ -361,24 +758,55 @@ class Simulation:
         avg = sum(counts)/len(counts) if counts else 0
         var = sum((x-avg)**2 for x in counts)/len(counts) if counts else 0
         print(f"Fairness (access variance): {var:.2f}")
-        turtle.bye()
+        if self.profiler is not None:
+            self.profiler.counts['searches'] = self.maze.search_stats['searches']
+            self.profiler.counts['nodes_expanded'] = self.maze.search_stats['expanded']
+            if self.maze.field is not None:
+                self.profiler.counts['field_cells_expanded'] = self.maze.field.expanded
+            self.profiler.print_summary()
+        if screen is not None:
+            turtle.bye()
 
     def run_tick(self):
         if not self.running:
             return
-        self.draw()
         self.step()
+        if not self.running:
+            return  # finish() drew the last frame and closed the window
+        # One frame per tick, after the move (main() drew the first one)
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+        self.draw()
         screen.update()
+        if prof is not None:
+            prof.lap('render')
         screen.ontimer(self.run_tick, int(1000/FPS))
 
 # === Main ===
 
 def main():
-    sim = Simulation()
+    cprof = cProfile.Profile() if CPROFILE_PATH else None
+    if cprof is not None:
+        cprof.enable()
+    maze_file = use_maze_file(MAZE_PATH) if MAZE_PATH else None
+    setup_screen()
+    sink = MetricsSink(METRICS_PATH) if METRICS_PATH else None
+    sim = Simulation(seed=SEED, metrics_sink=sink,
+                     profiler=Profiler() if PROFILE else None, maze_file=maze_file,
+                     cache=mazecache.PrecomputeCache(CACHE_DIR) if CACHE_DIR else None, planner=PLANNER)
     sim.draw()
     screen.update()
     screen.ontimer(sim.run_tick, int(1000/FPS))
-    screen.mainloop()
+    try:
+        screen.mainloop()
+    finally:
+        if sink is not None:
+            sink.close()  # a no-op if finish() closed it; closing the window early skips finish()
+        if cprof is not None:
+            cprof.disable()
+            cprof.dump_stats(CPROFILE_PATH)
+            pstats.Stats(cprof).sort_stats('cumulative').print_stats(15)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,13 +1,20 @@
 from tkinter import *
 import random
 
+import rootpath  # puts the repository root on sys.path
+from wallrects import draw_walls
+
 GRID_SIZE = 21        # 21x21 grid (odd better for centered start)
 CELL_SIZE = 25        # pixels
 AGENT_SIZE = 15       # diameter in pixels
+SEED = None           # set an int to repeat the same walk
+
 
 class GridApp:
-    def __init__(self, root):
+    def __init__(self, root, as_image=False, rng=None):
         self.root = root
+        self.rng = rng if rng is not None else random.Random()  # own seeded stream
+        self.as_image = as_image  # render the static maze once into a PhotoImage
         self.canvas = Canvas(root,
                              width=GRID_SIZE*CELL_SIZE,
                              height=GRID_SIZE*CELL_SIZE,
@@ -46,14 +53,8 @@ class GridApp:
         return maze
 
     def draw_maze(self):
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                x0, y0 = c*CELL_SIZE, r*CELL_SIZE
-                x1, y1 = x0+CELL_SIZE, y0+CELL_SIZE
-                if self.maze[r][c] == 1:
-                    self.canvas.create_rectangle(x0, y0, x1, y1, fill="black", outline="")
-                else:
-                    self.canvas.create_rectangle(x0, y0, x1, y1, fill="white", outline="")
+        """Draw the walls (see wallrects.draw_walls); as_image=True draws one PhotoImage."""
+        self.maze_image = draw_walls(self.canvas, self.maze, CELL_SIZE, self.as_image)
 
     def create_agent(self, row, col):
         x0 = col*CELL_SIZE + (CELL_SIZE-AGENT_SIZE)//2
@@ -73,7 +74,7 @@ class GridApp:
     def random_move(self):
         """Try random directions and move to the first valid path neighbor."""
         directions = [(-1,0), (1,0), (0,-1), (0,1)]  # up, down, left, right
-        random.shuffle(directions)
+        self.rng.shuffle(directions)
 
         for dr, dc in directions:
             new_row = self.agent_row + dr
@@ -89,5 +90,5 @@ class GridApp:
 if __name__ == "__main__":
     root = Tk()
     root.title("Random-moving Agent - Maze (odd walls, even paths visual)")
-    app = GridApp(root)
+    app = GridApp(root, rng=random.Random(SEED))
     root.mainloop()
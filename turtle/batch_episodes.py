@@ -0,0 +1,64 @@
+"""
+Monte Carlo runner for the test.py multi-agent engine.
+
+Runs N seeded headless episodes across a process pool and prints a
+summary table of the final metrics (conflicts, negotiations,
+arbitrations, Jain fairness, scores).
+
+How to run:
+    python batch_episodes.py --episodes 200 --seed 0
+"""
+
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# test.py imports pygame when it is installed; keep workers quiet
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from test import PLANNERS, run_episode
+
+
+def summarize(results):
+    # One row per metric: mean, stdev, min, max across episodes
+    keys = [k for k in results[0] if k != "seed"]
+    rows = []
+    for k in keys:
+        values = [r[k] for r in results]
+        sd = statistics.stdev(values) if len(values) > 1 else 0.0
+        rows.append((k, statistics.mean(values), sd, min(values), max(values)))
+    return rows
+
+
+def print_table(rows):
+    print(f"{'metric':<16}{'mean':>12}{'stdev':>12}{'min':>12}{'max':>12}")
+    for name, mean, sd, lo, hi in rows:
+        print(f"{name:<16}{mean:>12.3f}{sd:>12.3f}{lo:>12.3f}{hi:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seeded headless episodes in parallel.")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes (default: all cores)")
+    parser.add_argument("--planner", choices=PLANNERS, default="field")
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.episodes)
+    planners = [args.planner] * args.episodes
+    t0 = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            chunk = max(1, args.episodes // (args.workers * 4))
+            results = list(pool.map(run_episode, seeds, planners, chunksize=chunk))
+    else:
+        results = [run_episode(s, p) for s, p in zip(seeds, planners)]
+    elapsed = time.perf_counter() - t0
+
+    print(f"{args.episodes} episodes on {args.workers} worker(s) in {elapsed:.2f}s")
+    print_table(summarize(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Conflict-resolution benchmark for test.py
+
+Scatters N agents over an open grid, gives each a random neighbouring
+target (one winner per cell, as after the vertex-conflict stage) and
+times the old pairwise swap scan against resolve_moves(). No window.
+
+How to run:
+    python benchmark_conflicts.py [agents]
+"""
+
+import random
+import sys
+import time
+
+from test import neighbors, resolve_moves
+
+AGENTS = 1000
+TICKS = 20
+SEED = 0
+
+
+def pairwise_swaps(positions, winners):
+    # The old "Prevent swaps" scan, kept here only as the baseline
+    winners = dict(winners)
+    cancelled = 0
+    for aid, target in list(winners.items()):
+        for bid, t2 in list(winners.items()):
+            if aid != bid:
+                if target == positions.get(bid) and t2 == positions.get(aid):
+                    del winners[aid]
+                    del winners[bid]
+                    cancelled += 1
+                    break
+    return winners, cancelled
+
+
+def make_tick(rng, n):
+    side = int((n * 3) ** 0.5) + 2  # about one agent per three cells
+    cells = [(x, y) for x in range(side) for y in range(side)]
+    positions = dict(enumerate(rng.sample(cells, n)))
+    winners, taken = {}, set()
+    for aid, pos in positions.items():
+        options = [c for c in neighbors(pos) + [pos] if 0 <= c[0] < side and 0 <= c[1] < side and c not in taken]
+        if options:
+            target = rng.choice(options)
+            taken.add(target)
+            winners[aid] = target
+    return positions, winners
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else AGENTS
+    rng = random.Random(SEED)
+    ticks = [make_tick(rng, n) for _ in range(TICKS)]
+
+    t0 = time.perf_counter()
+    for positions, winners in ticks:
+        pairwise_swaps(positions, winners)
+    t_old = (time.perf_counter() - t0) / TICKS
+
+    t0 = time.perf_counter()
+    kinds = {}
+    for positions, winners in ticks:
+        _, stalls = resolve_moves(positions, winners)
+        for kind, _ in stalls:
+            kinds[kind] = kinds.get(kind, 0) + 1
+    t_new = (time.perf_counter() - t0) / TICKS
+
+    print(f"{n} agents, {TICKS} ticks")
+    print(f"pairwise swap scan: {t_old*1000:9.3f} ms/tick")
+    print(f"resolve_moves:      {t_new*1000:9.3f} ms/tick   x{t_old/t_new:.1f}")
+    print("conflicts found by resolve_moves:", ", ".join(f"{k}={v}" for k, v in sorted(kinds.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Planner comparison for test.py
+
+Runs the same seeded headless episodes with each planner ("field",
+"bfs", "astar", "graph" and the cooperative "whca") and reports stall
+ticks, conflicts, episode length, pellets left and wall time per
+episode. No window.
+
+How to run:
+    python benchmark_planners.py [episodes]
+"""
+
+import statistics
+import sys
+import time
+
+from test import PLANNERS, run_episode
+
+EPISODES = 10
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else EPISODES
+    print(f"{episodes} episodes per planner")
+    print(f"{'planner':<8}{'stall ticks':>12}{'conflicts':>11}{'steps':>8}{'pellets left':>14}{'ms/episode':>12}")
+    for planner in PLANNERS:
+        t0 = time.perf_counter()
+        results = [run_episode(seed, planner) for seed in range(episodes)]
+        ms = (time.perf_counter() - t0) * 1000 / episodes
+        mean = lambda key: statistics.mean(r[key] for r in results)
+        print(f"{planner:<8}{mean('total_wait'):>12.1f}{mean('conflicts'):>11.1f}{mean('steps'):>8.1f}"
+              f"{mean('pellets_left'):>14.1f}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Scaling benchmarks for test.py and maze.py
+
+Times maze generation (maze.generate_maze, its bit-packed backtracker
+and Eller variants, streaming to a maze file, test.build_maze), the
+precompute steps (place_pellets, compute_intersections), bfs_next_step
+against the same search on a CorridorGraph, on test.py's open layout
+and on a maze.py corridor maze of the same size, and a Renderer frame
+over a range of grid sizes and agent counts. Grid size is varied by
+resizing test.py's COLS/ROWS for the duration of a case. Rendering runs
+headless on the SDL dummy driver.
+
+Results are printed and appended to a JSON lines file by the shared
+benchharness.py (see there for the format).
+
+How to run:
+    python benchmark_suite.py [--quick] [--only NAME] [--repeats N] [--out FILE]
+"""
+
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import maze
+import test
+from benchharness import main, measure  # test put the root on sys.path
+
+SIZES = [(31, 21), (101, 71), (301, 201)]  # (cols, rows) for test.py
+TK_SIZES = [30, 100, 300]  # square maze.py grids
+PACKED_SIZES = [100, 300, 1000]  # square bit-packed maze.py grids
+STREAM_SIZES = [1000, 5000]  # square mazes streamed to a maze file
+AGENT_COUNTS = [1, 10, 100]
+RENDER_FRAMES = 50
+
+
+@contextmanager
+def grid_size(cols, rows):
+    # test.py reads its dimensions from module globals at call time
+    saved = test.COLS, test.ROWS, test.WIDTH, test.HEIGHT
+    test.COLS, test.ROWS = cols, rows
+    test.WIDTH, test.HEIGHT = cols * test.TILE, rows * test.TILE + 100
+    try:
+        yield
+    finally:
+        test.COLS, test.ROWS, test.WIDTH, test.HEIGHT = saved
+
+
+def bench_tk_generate(n, repeats):
+    def setup():
+        random.seed(0)
+        return maze.init_maze(n, n)
+    return measure(lambda wv: maze.generate_maze(wv[0], wv[1], n, n), setup, repeats)
+
+
+def bench_packed(generate, n, repeats):
+    return measure(lambda _: generate(n, n, random.Random(0)), repeats=repeats)
+
+
+def bench_stream(n, repeats):
+    path = os.path.join(tempfile.gettempdir(), "benchmark_maze.pmaz")
+    try:
+        return measure(lambda _: maze.write_maze_file(path, n, n, random.Random(0), "sidewinder"), repeats=repeats)
+    finally:
+        os.remove(path)
+
+
+def bench_build_maze(cols, rows, repeats):
+    with grid_size(cols, rows):
+        return measure(lambda _: test.build_maze(), repeats=repeats)
+
+
+def bench_place_pellets(cols, rows, repeats):
+    with grid_size(cols, rows):
+        grid = test.build_maze()
+        return measure(lambda _: test.place_pellets(grid), repeats=repeats)
+
+
+def bench_intersections(cols, rows, repeats):
+    with grid_size(cols, rows):
+        grid = test.build_maze()
+        return measure(lambda _: test.compute_intersections(grid), repeats=repeats)
+
+
+def layout_grid(layout, cols, rows):
+    # "open": test.build_maze(); "corridors": a maze.py perfect maze (odd sizes)
+    if layout == "open":
+        return test.build_maze()
+    kinds = maze.grid_kinds(rows // 2, cols // 2, random.Random(0))
+    return [[test.MAZE_CODES[k] for k in row] for row in kinds]
+
+
+def bench_bfs(cols, rows, agents, layout, repeats):
+    # Every agent searches to the far corner past the others as obstacles
+    with grid_size(cols, rows):
+        grid = layout_grid(layout, cols, rows)
+        rng = random.Random(0)
+        open_cells = [(x, y) for y in range(rows) for x in range(cols) if test.is_walkable(grid, (x, y))]
+        starts = rng.sample(open_cells, agents)
+        goal = {(cols - 2, rows - 2)}
+        blocked = set(starts)
+
+        def run(_):
+            for s in starts:
+                test.bfs_next_step(grid, s, goal, blocked - {s})
+        return measure(run, repeats=repeats)
+
+
+def bench_graph(cols, rows, agents, layout, repeats):
+    # bench_bfs on the corridor graph; building the graph is not timed
+    with grid_size(cols, rows):
+        grid = layout_grid(layout, cols, rows)
+        rng = random.Random(0)
+        open_cells = [(x, y) for y in range(rows) for x in range(cols) if test.is_walkable(grid, (x, y))]
+        starts = rng.sample(open_cells, agents)
+        graph = test.CorridorGraph(test.maze_analytics(grid)["degrees"], {(cols - 2, rows - 2)})
+        blocked = set(starts)
+
+        def run(_):
+            for s in starts:
+                graph.next_step(s, blocked - {s})
+        return measure(run, repeats=repeats)
+
+
+def bench_render(cols, rows, repeats):
+    # Mean over RENDER_FRAMES incremental frames of a stepping World
+    with grid_size(cols, rows):
+        pygame = test.pygame
+        pygame.init()
+        screen = pygame.display.set_mode((test.WIDTH, test.HEIGHT))
+        font = pygame.font.SysFont(None, 20)
+
+        def setup():
+            world = test.World(seed=0)
+            renderer = test.Renderer(screen, font, world)
+            renderer.draw()
+            return world, renderer
+
+        def run(wr):
+            world, renderer = wr
+            for _ in range(RENDER_FRAMES):
+                world.step()
+                renderer.draw()
+        best, mean = measure(run, setup, repeats)
+        pygame.quit()
+        return best / RENDER_FRAMES, mean / RENDER_FRAMES
+
+
+def cases(quick):
+    sizes = SIZES[:1] if quick else SIZES
+    agent_counts = AGENT_COUNTS[:1] if quick else AGENT_COUNTS
+    for n in (TK_SIZES[:1] if quick else TK_SIZES):
+        yield "maze.generate_maze", {"rows": n, "cols": n}, lambda r, n=n: bench_tk_generate(n, r)
+    for n in (PACKED_SIZES[:1] if quick else PACKED_SIZES):
+        p = {"rows": n, "cols": n}
+        yield "maze.generate_packed", p, lambda r, n=n: bench_packed(maze.generate_packed, n, r)
+        yield "maze.generate_eller", p, lambda r, n=n: bench_packed(maze.generate_eller, n, r)
+    for n in (STREAM_SIZES[:1] if quick else STREAM_SIZES):
+        yield "maze.write_maze_file", {"rows": n, "cols": n}, lambda r, n=n: bench_stream(n, r)
+    for cols, rows in sizes:
+        p = {"cols": cols, "rows": rows}
+        yield "build_maze", p, lambda r, c=cols, w=rows: bench_build_maze(c, w, r)
+        yield "place_pellets", p, lambda r, c=cols, w=rows: bench_place_pellets(c, w, r)
+        yield "compute_intersections", p, lambda r, c=cols, w=rows: bench_intersections(c, w, r)
+        for agents in agent_counts:
+            for layout in ("open", "corridors"):
+                q = dict(p, agents=agents, layout=layout)
+                yield "bfs_next_step", q, lambda r, c=cols, w=rows, a=agents, l=layout: bench_bfs(c, w, a, l, r)
+                yield "graph_next_step", q, lambda r, c=cols, w=rows, a=agents, l=layout: bench_graph(c, w, a, l, r)
+        if test.pygame is not None:
+            yield "render_frame", p, lambda r, c=cols, w=rows: bench_render(c, w, r)
+
+
+if __name__ == "__main__":
+    main("turtle", cases, "Scaling benchmarks for test.py and maze.py.", os.path.dirname(os.path.abspath(__file__)))
@@ -1,5 +1,19 @@
-import tkinter as tk
+import argparse
 import random
+from array import array
+
+try:
+    import tkinter as tk
+except ImportError:  # generating and writing maze files needs no window
+    tk = None
+
+try:
+    import numpy as np
+except ImportError:  # vectorises sidewinder_rows and grid_kinds when present
+    np = None
+
+import rootpath  # puts the repository root on sys.path
+import mazefile
 
 WIDTH = 600
 HEIGHT = 600
@@ -38,6 +52,202 @@ def generate_maze(walls, visited, rows, cols, start=(0,0)):
         else:
             stack.pop()
 
+# Bit-packed mazes for large grids: two bits per cell, RIGHT set when the
+# passage to the cell on the right is open, DOWN when the one below is.
+# Top and left walls are the neighbours' right/down bits (or the border),
+# so four cells fit in a byte and a 2000x2000 maze takes 1 MB.
+RIGHT, DOWN = 1, 2
+
+def packed_size(rows, cols):
+    return (rows * cols + 3) // 4
+
+def cell_bits(bits, i):
+    # RIGHT/DOWN bits of flat cell index i = r * cols + c
+    return (bits[i >> 2] >> ((i & 3) << 1)) & 3
+
+def open_bits(bits, i, code):
+    bits[i >> 2] |= code << ((i & 3) << 1)
+
+def generate_packed(rows, cols, rng=None, start=(0, 0)):
+    # Same recursive backtracker as generate_maze, on flat indices: the
+    # stack is an array of ints and visited one byte per cell
+    rng = rng if rng is not None else random.Random()
+    bits = bytearray(packed_size(rows, cols))
+    visited = bytearray(rows * cols)
+    i = start[0] * cols + start[1]
+    visited[i] = 1
+    stack = array('I', [i])
+    while stack:
+        i = stack[-1]
+        c = i % cols
+        options = []
+        if i >= cols and not visited[i - cols]: options.append(i - cols)
+        if c < cols - 1 and not visited[i + 1]: options.append(i + 1)
+        if i < (rows - 1) * cols and not visited[i + cols]: options.append(i + cols)
+        if c > 0 and not visited[i - 1]: options.append(i - 1)
+        if options:
+            j = rng.choice(options)
+            # remove the wall on whichever of the two cells owns it
+            if j == i + cols: open_bits(bits, i, DOWN)
+            elif j == i - cols: open_bits(bits, j, DOWN)
+            elif j > i: open_bits(bits, i, RIGHT)
+            else: open_bits(bits, j, RIGHT)
+            visited[j] = 1
+            stack.append(j)
+        else:
+            stack.pop()
+    return bits
+
+def eller_rows(rows, cols, rng=None):
+    # Eller's algorithm: yields one bytearray of RIGHT/DOWN codes per row,
+    # keeping only the current row's set labels, so memory is O(cols)
+    rng = rng if rng is not None else random.Random()
+    labels = list(range(cols))
+    for r in range(rows):
+        last = r == rows - 1
+        row = bytearray(cols)
+        # Join neighbours in different sets (always on the last row)
+        parent = list(range(cols))
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+        for c in range(cols - 1):
+            a, b = find(labels[c]), find(labels[c + 1])
+            if a != b and (last or rng.random() < 0.5):
+                parent[b] = a
+                row[c] |= RIGHT
+        labels = [find(l) for l in labels]
+        if last:
+            yield row
+            return
+        # Every set carries at least one cell down to the next row
+        members = {}
+        for c, l in enumerate(labels):
+            members.setdefault(l, []).append(c)
+        carried = {}
+        for l, cs in members.items():
+            down = [c for c in cs if rng.random() < 0.5] or [rng.choice(cs)]
+            for c in down:
+                row[c] |= DOWN
+                carried[c] = l
+        yield row
+        # Next row: renumber carried sets 0..k-1, fresh sets after them
+        renumber = {}
+        fresh = len(set(carried.values()))
+        nxt = []
+        for c in range(cols):
+            if c in carried:
+                nxt.append(renumber.setdefault(carried[c], len(renumber)))
+            else:
+                nxt.append(fresh)
+                fresh += 1
+        labels = nxt
+
+def generate_eller(rows, cols, rng=None):
+    bits = bytearray(packed_size(rows, cols))
+    i = 0
+    for row in eller_rows(rows, cols, rng):
+        for code in row:
+            if code:
+                open_bits(bits, i, code)
+            i += 1
+    return bits
+
+def unpack_walls(bits, rows, cols):
+    # Expand a packed maze into the [top, right, bottom, left] lists draw_maze uses
+    walls = []
+    for r in range(rows):
+        line = []
+        for c in range(cols):
+            i = r * cols + c
+            code = cell_bits(bits, i)
+            top = r == 0 or not cell_bits(bits, i - cols) & DOWN
+            left = c == 0 or not cell_bits(bits, i - 1) & RIGHT
+            line.append([top, not code & RIGHT, not code & DOWN, left])
+        walls.append(line)
+    return walls
+
+def sidewinder_rows(rows, cols, rng=None):
+    # Sidewinder, mirrored so runs carve down: a row depends only on its own
+    # random draws, so rows stream out in O(cols) memory. The last row is a
+    # single corridor. With numpy each row is a few vector operations.
+    rng = rng if rng is not None else random.Random()
+    if np is not None:
+        gen = np.random.Generator(np.random.PCG64(rng.getrandbits(64)))
+        for r in range(rows):
+            if r == rows - 1:
+                row = np.full(cols, RIGHT, dtype=np.uint8)
+                row[-1] = 0
+                yield row
+                return
+            extend = gen.random(cols) < 0.5
+            extend[-1] = False
+            ends = np.flatnonzero(~extend)
+            starts = np.concatenate(([0], ends[:-1] + 1))
+            picks = starts + (gen.random(len(ends)) * (ends - starts + 1)).astype(np.intp)
+            row = extend.astype(np.uint8)
+            row[picks] |= DOWN
+            yield row
+        return
+    for r in range(rows):
+        row = bytearray(cols)
+        if r == rows - 1:
+            for c in range(cols - 1):
+                row[c] = RIGHT
+            yield row
+            return
+        run_start = 0
+        for c in range(cols):
+            if c < cols - 1 and rng.random() < 0.5:
+                row[c] = RIGHT
+            else:
+                row[rng.randrange(run_start, c + 1)] |= DOWN
+                run_start = c + 1
+        yield row
+
+# Passage mazes become the usual (2*rows+1) x (2*cols+1) grid of mazefile
+# WALL/OPEN cells. Rows are streamed straight into mazefile.write_maze, so
+# writing needs O(cols) memory whatever the maze size.
+ROW_GENERATORS = {"eller": eller_rows, "sidewinder": sidewinder_rows}
+
+def grid_kinds(rows, cols, rng=None, algorithm="eller"):
+    # The cell line of each maze row and the line below it; with numpy
+    # each pair is built with a few slice assignments
+    gcols = 2 * cols + 1
+    if np is not None:
+        yield np.full(gcols, mazefile.WALL, dtype=np.uint8)
+        for codes in ROW_GENERATORS[algorithm](rows, cols, rng):
+            codes = np.asarray(codes, dtype=np.uint8)
+            cells = np.full(gcols, mazefile.WALL, dtype=np.uint8)
+            cells[1::2] = mazefile.OPEN
+            cells[2::2] = np.where(codes & RIGHT, mazefile.OPEN, mazefile.WALL)
+            below = np.full(gcols, mazefile.WALL, dtype=np.uint8)
+            below[1::2] = np.where(codes & DOWN, mazefile.OPEN, mazefile.WALL)
+            yield cells
+            yield below
+        return
+    yield [mazefile.WALL] * gcols
+    for codes in ROW_GENERATORS[algorithm](rows, cols, rng):
+        cells, below = [mazefile.WALL] * gcols, [mazefile.WALL] * gcols
+        for c, code in enumerate(codes):
+            x = 2 * c + 1
+            cells[x] = mazefile.OPEN
+            if code & RIGHT:
+                cells[x + 1] = mazefile.OPEN
+            if code & DOWN:
+                below[x] = mazefile.OPEN
+        yield cells
+        yield below  # the last maze row has no DOWN bits: bottom border
+
+def write_maze_file(path, rows, cols, rng=None, algorithm="eller"):
+    # Stream a rows x cols passage maze to the mazefile format every
+    # frontend loads; returns the grid size
+    grows, gcols = 2 * rows + 1, 2 * cols + 1
+    mazefile.write_maze(path, grows, gcols, grid_kinds(rows, cols, rng, algorithm))
+    return grows, gcols
+
 def draw_grid(canvas, width, height, cell, color="#dddddd"):
     # vertical lines
     for x in range(0, width + 1, cell):
@@ -77,8 +287,7 @@ def main():
     draw_grid(canvas, WIDTH, HEIGHT, CELL, color="#e5e5e5")
 
     # maze data
-    walls, visited = init_maze(ROWS, COLS)
-    generate_maze(walls, visited, ROWS, COLS, start=(0, 0))
+    walls = unpack_walls(generate_packed(ROWS, COLS), ROWS, COLS)
     carve_entrances(walls, ROWS, COLS)
 
     # draw maze walls
@@ -87,4 +296,15 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Draw a maze, or stream a large one to a maze file.")
+    parser.add_argument("--write", metavar="FILE", help="write a maze file the frontends load (--maze FILE) instead of opening a window")
+    parser.add_argument("--rows", type=int, default=ROWS, help="maze rows (grid rows = 2*rows+1)")
+    parser.add_argument("--cols", type=int, default=COLS, help="maze columns (grid cols = 2*cols+1)")
+    parser.add_argument("--algorithm", choices=sorted(ROW_GENERATORS), default="eller")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    if args.write:
+        grows, gcols = write_maze_file(args.write, args.rows, args.cols, random.Random(args.seed), args.algorithm)
+        print(f"wrote {grows}x{gcols} grid to {args.write}")
+    else:
+        main()
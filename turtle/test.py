@@ -1,6 +1,27 @@
-import pygame
+import argparse
+import cProfile
+import heapq
+import pstats
 import random
-from collections import deque, defaultdict
+import struct
+from array import array
+from collections import Counter, deque, defaultdict
+
+try:
+    import pygame
+except ImportError:  # headless runs only need the World core below
+    pygame = None
+
+try:
+    import numpy as np
+except ImportError:  # the uint8 grid is an optional accelerator
+    np = None
+
+import rootpath  # puts the repository root on sys.path
+import mazecache
+import mazefile
+from metrics import MetricsSink
+from profiler import Profiler
 
 # --------------------
 # Config
@@ -86,6 +107,33 @@ def place_pellets(grid):
             pellets.remove(p)
     return pellets, power
 
+# Maze files (see mazefile.py) store cells as (row, col), i.e. (y, x)
+MAZE_CODES = ('#', ' ', 'S')  # grid chars for mazefile WALL, OPEN, SHARED
+
+def save_maze(path):
+    # Write the built-in maze, its pellets and power pellets to a maze file
+    grid = build_maze()
+    pellets, power = place_pellets(grid)
+    kinds = ([MAZE_CODES.index(ch) for ch in row] for row in grid)
+    mazefile.write_maze(path, ROWS, COLS, kinds, pellets={(y, x) for x, y in pellets},
+                        power={(y, x) for x, y in power})
+
+def use_maze_file(path):
+    # Open a maze file and size the game to it; agent starts keep their
+    # places relative to the borders, moved to the nearest open cell
+    global COLS, ROWS, WIDTH, HEIGHT, AGENT_STARTS, POWER_PELLETS
+    maze = mazefile.MazeFile(path)
+    COLS, ROWS = maze.cols, maze.rows
+    WIDTH, HEIGHT = COLS * TILE, ROWS * TILE + 100
+    try:
+        AGENT_STARTS = [maze.nearest_open(y, x)[::-1] for x, y in
+                        [(1, ROWS - 2), (COLS - 2, ROWS - 2), (COLS // 2, 1)]]
+    except ValueError:
+        maze.close()
+        raise ValueError(f"{path} has no open cell to start on")
+    POWER_PELLETS = [(x, y) for y, x in maze.cells(maze.power)]
+    return maze
+
 def is_walkable(grid, pos):
     x, y = pos
     if not (0 <= x < COLS and 0 <= y < ROWS):
@@ -96,24 +144,68 @@ def neighbors(pos):
     x, y = pos
     return [(x, y - 1), (x + 1, y), (x, y + 1), (x - 1, y)]
 
-def bfs_next_step(grid, start, goals, blocked):
+# Same order as neighbors(), for batched expansion
+NEIGHBOR_OFFSETS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+BATCH_MIN = 64  # smaller queries use the per-cell loop; NumPy's fixed cost outweighs them
+# uint8 cell codes for grid_array()
+CELL_WALL, CELL_PATH, CELL_SHARED = 0, 1, 2
+
+def grid_array(grid):
+    # uint8 copy of the char grid indexed [y, x], or None without NumPy
+    if np is None:
+        return None
+    codes = {'#': CELL_WALL, 'S': CELL_SHARED}
+    return np.array([[codes.get(ch, CELL_PATH) for ch in row] for row in grid], dtype=np.uint8)
+
+def walkable_mask(grid, cells, array=None):
+    # Batched is_walkable for a sequence of (x, y) cells
+    if array is None:
+        return [is_walkable(grid, p) for p in cells]
+    cells = np.asarray(cells, dtype=np.intp).reshape(-1, 2)
+    x, y = cells[:, 0], cells[:, 1]
+    inside = (x >= 0) & (x < COLS) & (y >= 0) & (y < ROWS)
+    mask = np.zeros(len(cells), dtype=bool)
+    mask[inside] = array[y[inside], x[inside]] != CELL_WALL
+    return mask
+
+def open_neighbors(grid, positions, array=None):
+    # Walkable neighbours of every position, in neighbors() order, in one query
+    if array is None or len(positions) < BATCH_MIN:
+        return [[nb for nb in neighbors(p) if is_walkable(grid, nb)] for p in positions]
+    cand = np.asarray(positions, dtype=np.intp).reshape(-1, 1, 2) + np.array(NEIGHBOR_OFFSETS)
+    mask = walkable_mask(grid, cand.reshape(-1, 2), array).reshape(-1, 4)
+    return [
+        [tuple(nb) for nb, ok in zip(row, ok_row) if ok]
+        for row, ok_row in zip(cand.tolist(), mask.tolist())
+    ]
+
+def count_search(stats, expanded):
+    # stats is an optional Counter shared by every search in a World
+    if stats is not None:
+        stats["searches"] += 1
+        stats["expanded"] += expanded
+
+def first_step(prev, start, cur):
+    # Walk the predecessor map back from cur to the move that leaves start
+    node = cur
+    while prev[node] != start and prev[node] is not None:
+        node = prev[node]
+    return node if node != start else None
+
+def bfs_next_step(grid, start, goals, blocked, stats=None):
     # Goals is a set; blocked is set of cells to avoid
     if not goals:
         return None
     q = deque()
     q.append(start)
     prev = {start: None}
+    expanded = 0
     while q:
         cur = q.popleft()
+        expanded += 1
         if cur in goals:
-            # reconstruct path
-            path = []
-            node = cur
-            while node != start:
-                path.append(node)
-                node = prev[node]
-            path.reverse()
-            return path[0] if path else None
+            count_search(stats, expanded)
+            return first_step(prev, start, cur)
         for nb in neighbors(cur):
             if nb in prev:
                 continue
@@ -123,38 +215,380 @@ def bfs_next_step(grid, start, goals, blocked):
                 continue
             prev[nb] = cur
             q.append(nb)
+    count_search(stats, expanded)
+    return None
+
+def astar_next_step(grid, start, goal, blocked, stats=None):
+    # Single-target A*: Manhattan heuristic, binary heap, stops at the goal
+    if goal is None:
+        return None
+    def h(p):
+        return abs(p[0] - goal[0]) + abs(p[1] - goal[1])
+    g = {start: 0}
+    prev = {start: None}
+    # (f, -g, cell): among equal f, expand the node nearest the goal first
+    heap = [(h(start), 0, start)]
+    expanded = 0
+    while heap:
+        _, neg_g, cur = heapq.heappop(heap)
+        if -neg_g > g[cur]:
+            continue  # stale entry
+        expanded += 1
+        if cur == goal:
+            count_search(stats, expanded)
+            return first_step(prev, start, cur)
+        ng = -neg_g + 1
+        for nb in neighbors(cur):
+            if not is_walkable(grid, nb) or nb in blocked:
+                continue
+            if ng < g.get(nb, UNREACHED):
+                g[nb] = ng
+                prev[nb] = cur
+                heapq.heappush(heap, (ng + h(nb), -ng, nb))
+    count_search(stats, expanded)
     return None
 
+UNREACHED = float("inf")
+
+class DistanceField:
+    """Distance from every walkable cell to its nearest goal (pellet).
+
+    Cell indices and adjacency are built once per maze. The distance map is
+    a multi-source BFS from all goals; removing a goal only re-floods the
+    cells that were closest to it, so planning is a neighbour lookup.
+    """
+
+    def __init__(self, grid, goals):
+        self.cells = [(x, y) for y in range(ROWS) for x in range(COLS) if is_walkable(grid, (x, y))]
+        self.index = {pos: i for i, pos in enumerate(self.cells)}
+        # Neighbour indices kept in neighbors() order so ties break like the BFS did
+        self.adj = [
+            [self.index[nb] for nb in neighbors(pos) if nb in self.index]
+            for pos in self.cells
+        ]
+        self.dist = [UNREACHED] * len(self.cells)
+        self.source = [-1] * len(self.cells)
+        self.expanded = 0  # cells popped across the initial flood and every repair
+        self.goals = {self.index[g] for g in goals if g in self.index}
+        self._flood([(0, g, g) for g in self.goals])
+
+    def _flood(self, seeds, region=None):
+        # Dijkstra over unit edges; seeds may start at different distances
+        dist, source, adj = self.dist, self.source, self.adj
+        heap = list(seeds)
+        heapq.heapify(heap)
+        for d, i, src in heap:
+            dist[i] = d
+            source[i] = src
+        while heap:
+            d, i, src = heapq.heappop(heap)
+            if d > dist[i]:
+                continue
+            self.expanded += 1
+            for j in adj[i]:
+                if region is not None and j not in region:
+                    continue
+                if d + 1 < dist[j]:
+                    dist[j] = d + 1
+                    source[j] = src
+                    heapq.heappush(heap, (d + 1, j, src))
+
+    def remove_goal(self, pos):
+        g = self.index.get(pos)
+        if g is None or g not in self.goals:
+            return
+        self.goals.discard(g)
+        # Only cells whose nearest goal was g can change, and only upwards
+        # (they hang off g in the BFS forest, so a walk from g finds them all)
+        region = {g}
+        stack = [g]
+        while stack:
+            i = stack.pop()
+            for j in self.adj[i]:
+                if j not in region and self.source[j] == g:
+                    region.add(j)
+                    stack.append(j)
+        for i in region:
+            self.dist[i] = UNREACHED
+            self.source[i] = -1
+        seeds = []
+        for i in region:
+            best = None
+            for j in self.adj[i]:
+                if j not in region and self.dist[j] != UNREACHED:
+                    if best is None or self.dist[j] < best[0]:
+                        best = (self.dist[j], self.source[j])
+            if best is not None:
+                seeds.append((best[0] + 1, i, best[1]))
+        self._flood(seeds, region)
+
+    def to_state(self):
+        # Plain lists, dicts and sets for the precompute cache (see mazecache.py)
+        return dict(vars(self))
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls.__new__(cls)
+        vars(obj).update(state)
+        return obj
+
+    def distance(self, pos):
+        i = self.index.get(pos)
+        return UNREACHED if i is None else self.dist[i]
+
+    def next_step(self, start, blocked):
+        """Walkable, unblocked neighbour of start that is closest to a goal, or None."""
+        i = self.index.get(start)
+        if i is None or self.dist[i] in (0, UNREACHED):
+            return None
+        best, best_d = None, UNREACHED
+        for j in self.adj[i]:
+            pos = self.cells[j]
+            if pos in blocked:
+                continue
+            if self.dist[j] < best_d:
+                best, best_d = pos, self.dist[j]
+        return best
+
+class CorridorGraph:
+    """The maze collapsed to junctions and the corridors between them.
+
+    Nodes are walkable cells whose degree is not 2 (intersections and dead
+    ends); each run of degree-2 cells between two nodes is one weighted
+    edge. Goals are counted per corridor, so a search jumps straight over
+    every corridor with no goal and no blocked cell in it and only walks
+    the cells of the others.
+    """
+
+    def __init__(self, degrees, goals):
+        # degrees: walkable cell -> number of walkable neighbours (maze_analytics)
+        self.nodes = {pos for pos, d in degrees.items() if d != 2}
+        self.corridors = []  # (end a, interior cells from a to b, end b)
+        self.where = {}  # interior cell -> (corridor id, index in its cells)
+        # node -> [(corridor id, interior cells in travel order, far end)]
+        exits = defaultdict(list)
+        adjacent = set()
+        def walk_from(node):
+            for first in neighbors(node):
+                if first not in degrees or first in self.where:
+                    continue
+                if first in self.nodes:
+                    # Two neighbouring nodes: an empty corridor, added once
+                    if (first, node) in adjacent:
+                        continue
+                    adjacent.add((node, first))
+                cells, prev, cur = [], node, first
+                while cur not in self.nodes:
+                    cells.append(cur)
+                    prev, cur = cur, next(nb for nb in neighbors(cur) if nb in degrees and nb != prev)
+                cid = len(self.corridors)
+                self.corridors.append((node, tuple(cells), cur))
+                for i, pos in enumerate(cells):
+                    self.where[pos] = (cid, i)
+                exits[node].append((cid, tuple(cells), cur))
+                exits[cur].append((cid, tuple(reversed(cells)), node))
+        for node in sorted(self.nodes):
+            walk_from(node)
+        # A loop of degree-2 cells has no node; promote one of its cells
+        for pos in sorted(degrees):
+            if pos not in self.nodes and pos not in self.where:
+                self.nodes.add(pos)
+                walk_from(pos)
+        self.exits = dict(exits)
+        self.goals = {g for g in goals if g in degrees}
+        self.goal_counts = [0] * len(self.corridors)  # goals inside each corridor
+        for g in self.goals:
+            if g in self.where:
+                self.goal_counts[self.where[g][0]] += 1
+
+    def to_state(self):
+        # Plain lists, dicts and sets for the precompute cache (see mazecache.py)
+        return dict(vars(self))
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls.__new__(cls)
+        vars(obj).update(state)
+        return obj
+
+    def remove_goal(self, pos):
+        if pos not in self.goals:
+            return
+        self.goals.discard(pos)
+        if pos in self.where:
+            self.goal_counts[self.where[pos][0]] -= 1
+
+    def next_step(self, start, blocked, stats=None):
+        """First move on a shortest unblocked path from start to a goal, or None.
+
+        Dijkstra over the nodes; start may also lie inside a corridor, in
+        which case the search leaves it both ways.
+        """
+        goals = self.goals
+        if not goals or start in goals:
+            return None
+        if start in self.nodes:
+            exits = self.exits.get(start, ())
+        elif start in self.where:
+            cid, i = self.where[start]
+            a, cells, b = self.corridors[cid]
+            exits = [(cid, cells[i + 1:], b), (cid, cells[i - 1::-1] if i else (), a)]
+        else:
+            return None
+        counts = self.goal_counts
+        blocked_in = {self.where[b][0] for b in blocked if b in self.where}
+        dist = {start: 0}
+        heap = []  # (distance, tie, cell, first step, cell is a node)
+        tie = 0
+        def relax(exits, d, first):
+            nonlocal tie
+            for cid, cells, end in exits:
+                step = first or (cells[0] if cells else end)
+                nd = d + len(cells) + 1
+                if counts[cid] or cid in blocked_in:
+                    # Walk the cells up to the first goal or blocked cell
+                    stop = next((j for j, pos in enumerate(cells) if pos in goals or pos in blocked), None)
+                    if stop is not None:
+                        if cells[stop] not in blocked:
+                            heapq.heappush(heap, (d + stop + 1, tie, cells[stop], step, False))
+                            tie += 1
+                        continue
+                if end in blocked or nd >= dist.get(end, UNREACHED):
+                    continue
+                dist[end] = nd
+                heapq.heappush(heap, (nd, tie, end, step, True))
+                tie += 1
+        relax(exits, 0, None)
+        expanded = 0
+        while heap:
+            d, _, pos, first, is_node = heapq.heappop(heap)
+            if is_node and d > dist[pos]:
+                continue  # stale entry
+            expanded += 1
+            if not is_node or pos in goals:
+                count_search(stats, expanded)
+                return first
+            relax(self.exits.get(pos, ()), d, first)
+        count_search(stats, expanded)
+        return None
+
+class AgentStore:
+    """Struct-of-arrays state for every agent in a World.
+
+    Each numeric field is one typed array indexed by agent id, so a large
+    population costs a few bytes per field instead of a dict per agent.
+    Colours, the only rendering data, are kept apart in a plain list.
+    Agent objects are thin views onto one index.
+    """
+
+    def __init__(self, starts, colors):
+        n = len(starts)
+        self.x = array("i", [s[0] for s in starts])
+        self.y = array("i", [s[1] for s in starts])
+        self.score = array("i", [0]) * n
+        self.energy = array("d", [1.0]) * n
+        self.alive = array("b", [1]) * n
+        self.wait_time = array("i", [0]) * n
+        self.total_wait = array("i", [0]) * n
+        self.corridor_grants = array("i", [0]) * n
+        self.colors = [colors[i % len(colors)] for i in range(n)]
+        self.agents = [Agent(self, i) for i in range(n)]
+
+    def __len__(self):
+        return len(self.x)
+
+    def drain_energy(self, ids, cost):
+        """Charge cost to every agent in ids; those at or below zero die."""
+        if np is None:
+            energy, alive = self.energy, self.alive
+            for i in ids:
+                energy[i] -= cost
+                if energy[i] <= 0:
+                    alive[i] = 0
+            return
+        # Zero-copy NumPy views over the arrays for one vectorised pass
+        ids = np.asarray(ids, dtype=np.intp)
+        energy = np.frombuffer(self.energy, dtype=np.float64)
+        alive = np.frombuffer(self.alive, dtype=np.int8)
+        energy[ids] -= cost
+        alive[ids[energy[ids] <= 0]] = 0
+
+def _column(name):
+    # Agent attribute stored in the AgentStore array of the same name
+    return property(
+        lambda self: getattr(self.store, name)[self.id],
+        lambda self, value: getattr(self.store, name).__setitem__(self.id, value),
+    )
+
 class Agent:
-    def __init__(self, idx, start, color):
+    __slots__ = ("store", "id")
+
+    def __init__(self, store, idx):
+        self.store = store
         self.id = idx
-        self.pos = start
-        self.color = color
-        self.score = 0
-        self.energy = 1.0
-        self.alive = True
-        self.wait_time = 0
-        self.total_wait = 0
-        self.corridor_grants = 0
-
-    def plan(self, grid, pellets, power_pellets, occupied, shared_cells):
+
+    score = _column("score")
+    energy = _column("energy")
+    wait_time = _column("wait_time")
+    total_wait = _column("total_wait")
+    corridor_grants = _column("corridor_grants")
+
+    @property
+    def pos(self):
+        return (self.store.x[self.id], self.store.y[self.id])
+
+    @pos.setter
+    def pos(self, value):
+        self.store.x[self.id], self.store.y[self.id] = value
+
+    @property
+    def alive(self):
+        return bool(self.store.alive[self.id])
+
+    @alive.setter
+    def alive(self, value):
+        self.store.alive[self.id] = 1 if value else 0
+
+    @property
+    def color(self):
+        return self.store.colors[self.id]
+
+    def plan(self, grid, pellets, power_pellets, occupied, shared_cells, field=None,
+             planner="field", stats=None, graph=None):
+        # Next step towards a goal, or None when there is none (see explore)
+        pos = self.pos  # read once: the property builds a tuple from the store
+        blocked = set(occupied) - {pos}
+        if graph is not None:
+            # Corridor graph search; the graph tracks pellets and power pellets
+            return graph.next_step(pos, blocked, stats)
+        if planner == "astar":
+            # Nearest goal as the crow flies, then A* to it
+            x, y = pos
+            target = min(pellets | power_pellets, default=None,
+                         key=lambda p: abs(p[0] - x) + abs(p[1] - y))
+            return astar_next_step(grid, pos, target, blocked, stats)
+        if field is not None:
+            # Field already covers pellets and power pellets as goals
+            return field.next_step(pos, blocked)
         # Prefer nearest power pellet if close; otherwise nearest normal pellet
         goals = set(pellets)
         if power_pellets:
             # Heuristic: include power pellets as goals with same BFS for simplicity
             goals = goals.union(power_pellets)
-        blocked = set(occupied) - {self.pos}
-        nxt = bfs_next_step(grid, self.pos, goals, blocked)
-        if nxt is None:
-            # random jitter to explore
-            for nb in neighbors(self.pos):
-                if is_walkable(grid, nb) and nb not in blocked:
-                    return nb
-            return self.pos
-        return nxt
+        return bfs_next_step(grid, pos, goals, blocked, stats)
+
+    def explore(self, grid, occupied, open_nbs=None):
+        # random jitter to explore, for when plan() finds no step
+        if open_nbs is None:
+            open_nbs = [nb for nb in neighbors(self.pos) if is_walkable(grid, nb)]
+        for nb in open_nbs:
+            if nb not in occupied:
+                return nb
+        return self.pos
 
 class Mediator:
-    def __init__(self, agent_count):
+    def __init__(self, agent_count, rng=None):
+        self.rng = rng if rng is not None else random.Random()  # lottery draws
         self.token_owner = 0  # global token pass
         self.agent_count = agent_count
         self.successful_negotiations = 0
@@ -168,7 +602,7 @@ class Mediator:
             self.successful_negotiations += 1
             return winner, "token"
         # Fallback: lottery scheduling on contenders
-        winner = random.choice(contenders)
+        winner = self.rng.choice(contenders)
         self.arbitrations += 1
         return winner, "lottery"
 
@@ -184,43 +618,308 @@ def compute_intersections(grid):
                 inter.add((x, y))
     return inter
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont(None, 20)
+def maze_analytics(grid, maze_file=None):
+    # Degree of every walkable cell, the intersections among them and the
+    # shared corridor split into connected segments. A maze file already
+    # holds the adjacency, so it is read from there instead of the grid.
+    degrees = {}
+    if maze_file is not None:
+        degrees = {(x, y): d for (y, x), d in maze_file.degrees().items()}
+        shared = {(x, y) for y, x in maze_file.cells(maze_file.shared)}
+    else:
+        for y in range(ROWS):
+            for x in range(COLS):
+                if is_walkable(grid, (x, y)):
+                    degrees[(x, y)] = sum(1 for nb in neighbors((x, y)) if is_walkable(grid, nb))
+        shared = {(x, y) for y in range(ROWS) for x in range(COLS) if grid[y][x] == 'S'}
+    segments = []
+    unseen = set(shared)
+    while unseen:
+        stack = [unseen.pop()]
+        segment = []
+        while stack:
+            pos = stack.pop()
+            segment.append(pos)
+            for nb in neighbors(pos):
+                if nb in unseen:
+                    unseen.remove(nb)
+                    stack.append(nb)
+        segments.append(sorted(segment))
+    return {
+        "degrees": degrees,
+        "intersections": {pos for pos, d in degrees.items() if d >= 3},
+        "shared_segments": sorted(segments),
+    }
 
-    grid = build_maze()
-    pellets, power_pellets = place_pellets(grid)
+CACHE_VERSION = 1  # bump when anything stored in the precompute cache changes shape
 
-    agents = [Agent(i, AGENT_STARTS[i], AGENT_COLORS[i]) for i in range(3)]
-    mediator = Mediator(agent_count=len(agents))
+def maze_digest(grid=None, maze_file=None):
+    # mazefile digest of a maze's layout and pellets, the same for the
+    # built-in maze and its --save-maze copy; the built-in maze when neither is given
+    if maze_file is not None:
+        return maze_file.digest()
+    if grid is None:
+        grid = build_maze()
+    pellets, power = place_pellets(grid)
+    kinds = ([MAZE_CODES.index(ch) for ch in row] for row in grid)
+    return mazefile.layout_digest(ROWS, COLS, kinds, {(y, x) for x, y in pellets}, {(y, x) for x, y in power})
 
-    shared_cells = {(COLS // 2, y) for y in range(3, ROWS - 3)}
-    intersections = compute_intersections(grid)
+def maze_key(grid, maze_file=None):
+    # Content hash of a maze (and of this code's cache layout) for the precompute cache
+    return mazecache.content_key(f"test.py v{CACHE_VERSION}", maze_digest(grid, maze_file))
 
-    conflicts_detected = 0
-    steps = 0
+# Cooperative planner: windowed hierarchical cooperative A* (WHCA*)
+WHCA_WINDOW = 8  # ticks each agent plans ahead through the reservation table
 
-    running = True
-    while running:
-        steps += 1
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+class ReservationTable:
+    """Space-time cells and edges already claimed by agents planned this tick."""
+
+    def __init__(self):
+        self.cells = {}     # (cell, t) -> agent id
+        self.edges = set()  # (from, to, t) moves leaving at tick t
+
+    def is_free(self, frm, cell, t):
+        # Arriving in cell at t must not meet a reserved occupant or a head-on swap
+        return (cell, t) not in self.cells and (cell, frm, t - 1) not in self.edges
+
+    def reserve(self, aid, start, path, window=WHCA_WINDOW):
+        prev = start
+        for t, cell in enumerate(path, 1):
+            self.cells[(cell, t)] = aid
+            self.edges.add((prev, cell, t - 1))
+            prev = cell
+        # Whoever stops early keeps its last cell for the rest of the window
+        for t in range(len(path) + 1, window + 1):
+            self.cells[(prev, t)] = aid
+
+def whca_path(grid, field, table, start, window=WHCA_WINDOW):
+    """Space-time A* from start toward the nearest goal, avoiding reservations.
+
+    States are (cell, tick) with waiting as a move; the DistanceField value is
+    the heuristic, and the search ends at a goal or at the window edge, where
+    the field stands in for the rest of the route. Returns the cells for
+    ticks 1..k (empty if the agent should wait).
+    """
+    h = field.distance(start)
+    if h in (0, UNREACHED):
+        return []
+    prev = {(start, 0): None}
+    heap = [(h, 0, start)]
+    while heap:
+        f, negt, cell = heapq.heappop(heap)
+        t = -negt
+        if t == window or field.distance(cell) == 0:
+            path = []
+            node = (cell, t)
+            while prev[node] is not None:
+                path.append(node[0])
+                node = prev[node]
+            path.reverse()
+            return path
+        for nb in [cell] + neighbors(cell):
+            if nb != cell and not is_walkable(grid, nb):
+                continue
+            if (nb, t + 1) in prev or not table.is_free(cell, nb, t + 1):
+                continue
+            h = field.distance(nb)
+            if h == UNREACHED:
+                continue
+            prev[(nb, t + 1)] = (cell, t)
+            # Ties go to the deeper state so agents commit to progress
+            heapq.heappush(heap, (t + 1 + h, -(t + 1), nb))
+    return []
+
+# Move conflicts left after the vertex (same target cell) stage
+ALLOW_ROTATIONS = False  # let 3+ agents rotate through each other's cells
+
+def resolve_moves(positions, winners):
+    """Split vertex-conflict winners into agents that move and agents that wait.
+
+    positions maps agent id -> current cell, winners maps agent id -> target
+    cell (at most one id per target). Following each winner into the cell it
+    targets gives a graph where every agent points at no more than one other,
+    so a single pass with a visited map classifies every agent:
+      - a chain ending on a free cell moves as a whole;
+      - a chain ending on an agent that does not move waits ("blocked");
+      - a 2-cycle is an edge swap ("swap"), a longer one a rotation ("cycle").
+    Returns (moves, stalls): moves maps id -> target, stalls is a list of
+    (kind, [ids]) with one entry per conflict.
+    """
+    occupant = {pos: aid for aid, pos in positions.items()}
+    state = {}  # id -> True (moves) / False (waits)
+    stalls = []
+    for start in winners:
+        if start in state:
+            continue
+        path = []
+        on_path = {}
+        cur = start
+        while True:
+            if cur in state:
+                ok = state[cur]
+                break
+            target = winners[cur]
+            if target == positions[cur]:
+                state[cur] = True  # staying put never blocks anyone else's move
+                ok = True
+                break
+            on_path[cur] = len(path)
+            path.append(cur)
+            nxt = occupant.get(target)
+            if nxt is None:
+                ok = True
+                break
+            if nxt not in winners:
+                ok = False
+                stalls.append(("blocked", [cur]))
+                path.pop()
+                state[cur] = False
+                break
+            if nxt in on_path:
+                cycle = path[on_path[nxt]:]
+                del path[on_path[nxt]:]
+                ok = len(cycle) > 2 and ALLOW_ROTATIONS
+                for aid in cycle:
+                    state[aid] = ok
+                if not ok:
+                    stalls.append(("swap" if len(cycle) == 2 else "cycle", cycle))
+                break
+            cur = nxt
+        # Everyone still on the path follows the agent in front of them
+        for aid in reversed(path):
+            if not ok:
+                stalls.append(("blocked", [aid]))
+            state[aid] = ok
+    moves = {aid: winners[aid] for aid, ok in state.items() if ok}
+    return moves, stalls
+
+
+PLANNERS = ("field", "whca", "bfs", "astar", "graph")  # see World.__init__
 
+class World:
+    """Maze, pellets, agents and mediator, advanced one tick at a time.
+
+    Nothing in here touches pygame, so a World can be stepped headless as
+    fast as the CPU allows; main() only wraps it with drawing and a clock.
+    """
+
+    def __init__(self, planner="field", seed=None, replay=None, metrics_sink=None, profiler=None,
+                 maze_file=None, cache=None):
+        # Every random draw comes from this World's own generator, so a seed
+        # reproduces an episode exactly; without one a seed is picked and kept
+        self.seed = seed if seed is not None else random.randrange(2**62)
+        self.rng = random.Random(self.seed)
+        self.replay = replay  # optional ReplayWriter fed every tick
+        self.metrics_sink = metrics_sink  # optional MetricsSink, one row per tick
+        self.profiler = profiler  # optional Profiler; phases are only timed when set
+        if maze_file is None:
+            self.grid = build_maze()
+            self.array = grid_array(self.grid)
+            self.pellets, self.power_pellets = place_pellets(self.grid)
+        else:
+            # Decoded from the mapped file in one pass (see use_maze_file)
+            self.grid = maze_file.grid(MAZE_CODES)
+            self.array = maze_file.kinds_array()
+            self.pellets = {(x, y) for y, x in maze_file.cells(maze_file.pellets)}
+            self.power_pellets = {(x, y) for y, x in maze_file.cells(maze_file.power)}
+        # planner: "field" (distance-field lookup), "whca" (cooperative
+        # reservation-table A*), "bfs" (a fresh BFS per agent per tick),
+        # "astar" (A* per agent per tick to its Manhattan-nearest pellet) or
+        # "graph" (a search over the CorridorGraph per agent per tick)
+        if planner not in PLANNERS:
+            raise ValueError(f"unknown planner {planner!r}")
+        self.planner = planner
+        # Optional mazecache.PrecomputeCache: everything derived from the maze
+        # alone is looked up by its content hash before being computed
+        self.cache = cache
+        key = maze_key(self.grid, maze_file) if cache is not None else None
+        if cache is None:
+            analytics = maze_analytics(self.grid, maze_file)
+        else:
+            analytics = cache.cached(key, "analytics", lambda: maze_analytics(self.grid, maze_file))
+        self.degrees = analytics["degrees"]
+        self.intersections = analytics["intersections"]
+        self.shared_segments = analytics["shared_segments"]
+        self.field = None
+        self.graph = None
+        goals = self.pellets | self.power_pellets
+        if planner in ("field", "whca"):
+            if cache is None:
+                self.field = DistanceField(self.grid, goals)
+            else:
+                goals_key = mazecache.content_key(key, repr(sorted(goals)))
+                state = cache.cached(goals_key, "distance_field", lambda: DistanceField(self.grid, goals).to_state())
+                self.field = DistanceField.from_state(state)
+        elif planner == "graph":
+            if cache is None:
+                self.graph = CorridorGraph(self.degrees, goals)
+            else:
+                goals_key = mazecache.content_key(key, repr(sorted(goals)))
+                state = cache.cached(goals_key, "corridor_graph", lambda: CorridorGraph(self.degrees, goals).to_state())
+                self.graph = CorridorGraph.from_state(state)
+        self.search_stats = Counter()  # searches run / nodes expanded by bfs, astar and graph
+
+        self.store = AgentStore(AGENT_STARTS, AGENT_COLORS)
+        self.agents = self.store.agents
+        self.mediator = Mediator(agent_count=len(self.agents), rng=self.rng)
+
+        if maze_file is None:
+            self.shared_cells = {(COLS // 2, y) for y in range(3, ROWS - 3)}
+        else:
+            self.shared_cells = {(x, y) for y, x in maze_file.cells(maze_file.shared)}
+
+        self.conflicts_detected = 0
+        self.steps = 0
+        self.running = True
+
+    def _stall(self, ag):
+        ag.wait_time += 1
+        ag.total_wait += 1
+        ag.energy -= STALL_ENERGY_PENALTY
+
+    def step(self):
+        """Run one intent/resolve/move tick. Returns False once the episode is over."""
+        if not self.running:
+            return False
+        agents = self.agents
+        pellets, power_pellets = self.pellets, self.power_pellets
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+
+        self.steps += 1
+        conflicts_before = self.conflicts_detected
         alive_agents = [a for a in agents if a.alive]
-        if not alive_agents or steps >= TIME_LIMIT_STEPS or (not pellets and not power_pellets):
-            running = False
+        # The tick that notices the end still runs, as the windowed loop always did
+        if not alive_agents or self.steps >= TIME_LIMIT_STEPS or (not pellets and not power_pellets):
+            self.running = False
 
         # Intent phase
         occupied = {a.pos for a in alive_agents}
         intents = defaultdict(list)
-        plans = {}
-        for a in alive_agents:
-            nxt = a.plan(grid, pellets, power_pellets, occupied, shared_cells)
-            plans[a.id] = nxt
-            intents[nxt].append(a.id)
+        if self.planner == "whca":
+            table = ReservationTable()
+            # Rotate planning priority so no agent always plans around the others
+            k = self.steps % len(alive_agents) if alive_agents else 0
+            for a in alive_agents[k:] + alive_agents[:k]:
+                path = whca_path(self.grid, self.field, table, a.pos)
+                table.reserve(a.id, a.pos, path)
+                intents[path[0] if path else a.pos].append(a.id)
+        else:
+            moves = [a.plan(self.grid, pellets, power_pellets, occupied, self.shared_cells, self.field,
+                            self.planner, self.search_stats, self.graph) for a in alive_agents]
+            # Only agents with no step to a goal need their neighbours, all in one query
+            stuck = [i for i, nxt in enumerate(moves) if nxt is None]
+            if stuck:
+                sensed = open_neighbors(self.grid, [alive_agents[i].pos for i in stuck], self.array)
+                for i, open_nbs in zip(stuck, sensed):
+                    moves[i] = alive_agents[i].explore(self.grid, occupied, open_nbs)
+            for a, nxt in zip(alive_agents, moves):
+                intents[nxt].append(a.id)
+
+        tick_intents = {aid: cell for cell, ids in intents.items() for aid in ids}
+        if prof is not None:
+            prof.lap("plan")
 
         # Resolve phase
         winners = {}
@@ -229,46 +928,29 @@ def main():
                 winners[contenders[0]] = cell
             else:
                 # Conflict
-                conflicts_detected += 1
-                if cell in shared_cells:
-                    winner, mode = mediator.resolve_shared(contenders)
+                self.conflicts_detected += 1
+                if cell in self.shared_cells:
+                    winner, mode = self.mediator.resolve_shared(contenders)
                     winners[winner] = cell
                     for pid in contenders:
                         if pid != winner:
-                            ag = agents[pid]
-                            ag.wait_time += 1
-                            ag.total_wait += 1
-                            ag.energy -= STALL_ENERGY_PENALTY
-                        else:
-                            if mode == "token":
-                                agents[pid].corridor_grants += 1
+                            self._stall(agents[pid])
+                        elif mode == "token":
+                            agents[pid].corridor_grants += 1
                 else:
                     # Non-shared: all wait
                     for pid in contenders:
-                        ag = agents[pid]
-                        ag.wait_time += 1
-                        ag.total_wait += 1
-                        ag.energy -= STALL_ENERGY_PENALTY
+                        self._stall(agents[pid])
 
-        # Prevent swaps (A->B, B->A)
+        # Swaps, rotations and agents following someone who cannot move
         positions_before = {a.id: a.pos for a in alive_agents}
-        for aid, target in list(winners.items()):
-            for bid, t2 in list(winners.items()):
-                if aid != bid:
-                    if target == positions_before.get(bid) and t2 == positions_before.get(aid):
-                        # cancel both
-                        del winners[aid]
-                        del winners[bid]
-                        a = agents[aid]
-                        b = agents[bid]
-                        a.wait_time += 1
-                        b.wait_time += 1
-                        a.total_wait += 1
-                        b.total_wait += 1
-                        a.energy -= STALL_ENERGY_PENALTY
-                        b.energy -= STALL_ENERGY_PENALTY
-                        conflicts_detected += 1
-                        break
+        winners, stalls = resolve_moves(positions_before, winners)
+        for kind, ids in stalls:
+            for aid in ids:
+                self._stall(agents[aid])
+            self.conflicts_detected += 1
+        if prof is not None:
+            prof.lap("resolve")
 
         # Move winners and update pellets/energy
         for a in alive_agents:
@@ -278,83 +960,410 @@ def main():
             if a.pos in power_pellets:
                 a.score += POWER_PELLET_SCORE
                 power_pellets.remove(a.pos)
+                if self.field is not None:
+                    self.field.remove_goal(a.pos)
+                if self.graph is not None:
+                    self.graph.remove_goal(a.pos)
             elif a.pos in pellets:
                 a.score += PELLET_SCORE
                 pellets.remove(a.pos)
+                if self.field is not None:
+                    self.field.remove_goal(a.pos)
+                if self.graph is not None:
+                    self.graph.remove_goal(a.pos)
+
+        # Energy drain and death, one pass over the store
+        self.store.drain_energy([a.id for a in alive_agents], STEP_ENERGY_COST)
+        if prof is not None:
+            prof.lap("pellets")
+
+        if self.replay is not None:
+            self.replay.write_tick(self.steps, [(a.id, tick_intents[a.id], a.pos) for a in alive_agents])
+        if self.metrics_sink is not None:
+            self.metrics_sink.write(self.tick_row(self.conflicts_detected - conflicts_before))
+        if prof is not None:
+            prof.lap("export")
+            prof.ticks += 1
+
+        return self.running
+
+    def tick_row(self, tick_conflicts):
+        alive = [a for a in self.agents if a.alive]
+        return {
+            "step": self.steps,
+            "pellets_left": len(self.pellets) + len(self.power_pellets),
+            "conflicts": tick_conflicts,
+            "conflicts_total": self.conflicts_detected,
+            "negotiations": self.mediator.successful_negotiations,
+            "arbitrations": self.mediator.arbitrations,
+            "total_wait": sum(a.total_wait for a in self.agents),
+            "alive": len(alive),
+            "mean_energy": round(sum(a.energy for a in alive) / len(alive), 4) if alive else 0.0,
+        }
+
+    def jain_fairness(self):
+        # Jain's fairness on corridor grants (avoid div by zero)
+        grants = [max(0, a.corridor_grants) for a in self.agents]
+        n = len(grants)
+        s1 = sum(grants)
+        s2 = sum(g * g for g in grants)
+        if s2 > 0:
+            return (s1 * s1) / (n * s2)
+        return 0.0
+
+    def metrics(self):
+        """Final episode numbers as a flat, picklable dict."""
+        m = {
+            "steps": self.steps,
+            "conflicts": self.conflicts_detected,
+            "negotiations": self.mediator.successful_negotiations,
+            "arbitrations": self.mediator.arbitrations,
+            "jain_fairness": self.jain_fairness(),
+            "pellets_left": len(self.pellets) + len(self.power_pellets),
+            "total_score": sum(a.score for a in self.agents),
+            "total_wait": sum(a.total_wait for a in self.agents),
+            "alive": sum(1 for a in self.agents if a.alive),
+        }
+        for i, a in enumerate(self.agents):
+            m[f"score_a{i}"] = a.score
+        return m
+
+    def print_profile(self):
+        prof = self.profiler
+        if prof is None:
+            return
+        prof.counts["searches"] = self.search_stats["searches"]
+        prof.counts["nodes_expanded"] = self.search_stats["expanded"]
+        if self.field is not None:
+            prof.counts["field_cells_expanded"] = self.field.expanded
+        if self.cache is not None:
+            prof.counts["cache_hits"] = self.cache.hits
+            prof.counts["cache_misses"] = self.cache.misses
+        prof.print_summary()
+
+    def print_metrics(self):
+        print("Final Metrics:")
+        print(f"Seed: {self.seed}")
+        print(f"Steps: {self.steps}")
+        print(f"Conflicts: {self.conflicts_detected}")
+        print(f"Negotiations(token): {self.mediator.successful_negotiations}")
+        print(f"Arbitrations(lottery): {self.mediator.arbitrations}")
+        for i, a in enumerate(self.agents):
+            print(f"A{i}: Score={a.score}, TotalWait={a.total_wait}, Energy={a.energy:.2f}, Grants={a.corridor_grants}, Alive={a.alive}")
+
+
+def run_headless(planner="field", seed=None, replay=None, metrics_sink=None, profiler=None, maze_file=None,
+                 cache=None):
+    """Step a fresh World to the end of its episode with no window or clock."""
+    world = World(planner=planner, seed=seed, replay=replay, metrics_sink=metrics_sink, profiler=profiler,
+                  maze_file=maze_file, cache=cache)
+    while world.step():
+        pass
+    if metrics_sink is not None:
+        metrics_sink.close()
+    return world
+
+
+def run_episode(seed, planner="field"):
+    """Seeded headless episode; returns World.metrics() plus the seed."""
+    m = run_headless(planner=planner, seed=seed).metrics()
+    m["seed"] = seed
+    return m
+
+
+# --------------------
+# Replay log: header, then per tick the intent and resulting cell of every
+# live agent, little-endian. About 10 bytes per agent per tick. The header
+# holds the maze digest, so a log is only replayed on the maze it was
+# recorded on.
+# --------------------
+REPLAY_MAGIC = b"PMRL"
+REPLAY_VERSION = 3
+REPLAY_HEADER = struct.Struct("<4sBq32sB")  # magic, version, seed, maze SHA-256, planner name length
+REPLAY_TICK = struct.Struct("<IH")       # step, number of agent records
+REPLAY_AGENT = struct.Struct("<Hiiii")   # id, intent x, y, cell after the tick x, y
+
+class ReplayWriter:
+    def __init__(self, fp, seed, planner, digest):
+        # digest: maze_digest() of the maze the episode runs on
+        self.fp = fp
+        name = planner.encode()
+        fp.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, bytes.fromhex(digest), len(name)) + name)
+
+    def write_tick(self, step, records):
+        parts = [REPLAY_TICK.pack(step, len(records))]
+        for aid, (ix, iy), (px, py) in records:
+            parts.append(REPLAY_AGENT.pack(aid, ix, iy, px, py))
+        self.fp.write(b"".join(parts))
+
+
+def read_replay(fp):
+    """Return (seed, planner, maze digest, ticks); ticks yields (step, records) lazily."""
+    magic, version, seed, digest, name_len = REPLAY_HEADER.unpack(fp.read(REPLAY_HEADER.size))
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError("not a replay log (or an unsupported version)")
+    planner = fp.read(name_len).decode()
+
+    def ticks():
+        while True:
+            head = fp.read(REPLAY_TICK.size)
+            if not head:
+                return
+            step, n = REPLAY_TICK.unpack(head)
+            body = fp.read(REPLAY_AGENT.size * n)
+            records = [(aid, (ix, iy), (px, py))
+                       for aid, ix, iy, px, py in REPLAY_AGENT.iter_unpack(body)]
+            yield step, records
+
+    return seed, planner, digest.hex(), ticks()
+
+
+def record_episode(path, seed, planner="field", maze_file=None, cache=None):
+    with open(path, "wb") as fp:
+        replay = ReplayWriter(fp, seed, planner, maze_digest(maze_file=maze_file))
+        return run_headless(planner=planner, seed=seed, replay=replay, maze_file=maze_file, cache=cache)
 
-            # Energy drain and death
-            a.energy -= STEP_ENERGY_COST
-            if a.energy <= 0:
-                a.alive = False
 
-        # Draw
-        screen.fill(BLACK)
+class _ReplayCheck:
+    # ReplayWriter stand-in that compares each tick against the recording
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.mismatch = None
+
+    def write_tick(self, step, records):
+        if self.mismatch is None and next(self.ticks, None) != (step, records):
+            self.mismatch = step
+
+
+def verify_replay(path, planner=None, maze_file=None, cache=None):
+    """Re-run a recorded episode headless and compare every tick.
+
+    planner defaults to the recorded one; pass another to check that a
+    different engine produces the same trajectories. Returns the first
+    step that differs, or None when the runs match tick for tick. Raises
+    ValueError when the log was recorded on a different maze.
+    """
+    with open(path, "rb") as fp:
+        seed, recorded_planner, digest, ticks = read_replay(fp)
+        if digest != maze_digest(maze_file=maze_file):
+            raise ValueError(f"{path} was recorded on a different maze")
+        check = _ReplayCheck(ticks)
+        run_headless(planner=planner or recorded_planner, seed=seed, replay=check, maze_file=maze_file, cache=cache)
+        if check.mismatch is None and next(ticks, None) is not None:
+            return -1  # the recording is longer than the re-run
+        return check.mismatch
+
+
+def cell_rect(pos):
+    x, y = pos
+    return pygame.Rect(x * TILE, y * TILE, TILE, TILE)
+
+
+class Renderer:
+    """Draws a World into a pygame window.
+
+    Walls, the shared-corridor overlay and intersection markers never
+    change, so they are rendered once into a cached Surface. Each frame
+    only the cells an agent left or entered and the cells whose pellet
+    was eaten are restored from that surface, plus the HUD strip, and
+    just those rects go to pygame.display.update().
+    """
+
+    def __init__(self, screen, font, world):
+        self.screen = screen
+        self.font = font
+        self.world = world
+        self.static = self.render_static()
+        self.hud_rect = pygame.Rect(0, ROWS * TILE, WIDTH, HEIGHT - ROWS * TILE)
+        self.drawn_agents = {}  # agent id -> cell it was drawn on
+        self.drawn_pellets = set()
+        self.first_frame = True
+        self.draw_calls = 0  # per-frame blits and draw primitives, for profiling
+
+    def render_static(self):
+        world = self.world
+        surf = pygame.Surface((WIDTH, ROWS * TILE))
+        surf.fill(BLACK)
         # Maze
         for y in range(ROWS):
             for x in range(COLS):
-                r = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
-                if grid[y][x] == '#':
-                    pygame.draw.rect(screen, WALL_BLUE, r)
+                if world.grid[y][x] == '#':
+                    pygame.draw.rect(surf, WALL_BLUE, cell_rect((x, y)))
         # Shared corridor overlay
-        for (x, y) in shared_cells:
-            r = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
-            pygame.draw.rect(screen, SHARED_RED, r, 2)
+        for pos in world.shared_cells:
+            pygame.draw.rect(surf, SHARED_RED, cell_rect(pos), 2)
         # Intersections
-        for (x, y) in intersections:
+        for (x, y) in world.intersections:
             r = pygame.Rect(x * TILE + TILE // 4, y * TILE + TILE // 4, TILE // 2, TILE // 2)
-            pygame.draw.rect(screen, INTERSECTION_PURPLE, r, 1)
-
-        # Pellets
-        for (x, y) in pellets:
-            cx, cy = x * TILE + TILE // 2, y * TILE + TILE // 2
-            pygame.draw.circle(screen, PELLET_YELLOW, (cx, cy), 3)
-        for (x, y) in power_pellets:
-            cx, cy = x * TILE + TILE // 2, y * TILE + TILE // 2
-            pygame.draw.circle(screen, POWER_PINK, (cx, cy), 6)
-
-        # Agents
-        for a in agents:
-            if not a.alive:
-                continue
-            cx, cy = a.pos[0] * TILE + TILE // 2, a.pos[1] * TILE + TILE // 2
-            pygame.draw.circle(screen, a.color, (cx, cy), TILE // 2 - 2)
+            pygame.draw.rect(surf, INTERSECTION_PURPLE, r, 1)
+        return surf
+
+    def draw_pellet(self, pos):
+        x, y = pos
+        cx, cy = x * TILE + TILE // 2, y * TILE + TILE // 2
+        if pos in self.world.power_pellets:
+            pygame.draw.circle(self.screen, POWER_PINK, (cx, cy), 6)
+            self.draw_calls += 1
+        elif pos in self.world.pellets:
+            pygame.draw.circle(self.screen, PELLET_YELLOW, (cx, cy), 3)
+            self.draw_calls += 1
 
-        # HUD
-        hud_y = ROWS * TILE
-        pygame.draw.rect(screen, HUD_GRAY, pygame.Rect(0, hud_y, WIDTH, HEIGHT - hud_y))
+    def draw_agent(self, a):
+        cx, cy = a.pos[0] * TILE + TILE // 2, a.pos[1] * TILE + TILE // 2
+        pygame.draw.circle(self.screen, a.color, (cx, cy), TILE // 2 - 2)
+        self.draw_calls += 1
+
+    def draw(self):
+        world = self.world
+        alive = [a for a in world.agents if a.alive]
+        pellets_now = world.pellets | world.power_pellets
+
+        if self.first_frame:
+            self.screen.blit(self.static, (0, 0))
+            self.draw_calls += 1
+            for pos in pellets_now:
+                self.draw_pellet(pos)
+            dirty_cells = set()
+        else:
+            dirty_cells = set(self.drawn_agents.values()) | (self.drawn_pellets - pellets_now)
+            dirty_cells.update(a.pos for a in alive)
+            for pos in dirty_cells:
+                r = cell_rect(pos)
+                self.screen.blit(self.static, r, r)
+                self.draw_calls += 1
+                self.draw_pellet(pos)
+
+        # Agents (all cells an agent could be drawn over were restored above)
+        for a in alive:
+            if self.first_frame or a.pos in dirty_cells:
+                self.draw_agent(a)
+        self.drawn_agents = {a.id: a.pos for a in alive}
+        self.drawn_pellets = pellets_now
+
+        self.draw_hud()
+        if self.first_frame:
+            pygame.display.flip()
+            self.first_frame = False
+        else:
+            pygame.display.update([cell_rect(pos) for pos in dirty_cells] + [self.hud_rect])
+
+    def draw_hud(self):
+        world = self.world
+        hud_y = self.hud_rect.top
+        pygame.draw.rect(self.screen, HUD_GRAY, self.hud_rect)
+        self.draw_calls += 1
         info = [
-            f"Step: {steps}  Pellets left: {len(pellets)+len(power_pellets)}  Conflicts: {conflicts_detected}",
-            f"Negotiations(token): {mediator.successful_negotiations}  Arbitrations(lottery): {mediator.arbitrations}",
+            f"Step: {world.steps}  Pellets left: {len(world.pellets)+len(world.power_pellets)}  Conflicts: {world.conflicts_detected}",
+            f"Negotiations(token): {world.mediator.successful_negotiations}  Arbitrations(lottery): {world.mediator.arbitrations}",
         ]
-        for i, a in enumerate(agents):
+        for i, a in enumerate(world.agents):
             info.append(
                 f"A{i} Score:{a.score} Energy:{a.energy:.2f} Wait:{a.total_wait} Grants:{a.corridor_grants} Alive:{a.alive}"
             )
-        # Compute Jain's fairness on corridor grants (avoid div by zero)
-        grants = [max(0, a.corridor_grants) for a in agents]
-        n = len(grants)
-        s1 = sum(grants)
-        s2 = sum(g * g for g in grants)
-        if s2 > 0:
-            jain = (s1 * s1) / (n * s2)
-        else:
-            jain = 0.0
-        info.append(f"Jain fairness (grants): {jain:.3f}")
+        info.append(f"Jain fairness (grants): {world.jain_fairness():.3f}")
         for i, line in enumerate(info):
-            surf = font.render(line, True, (20, 20, 20))
-            screen.blit(surf, (8, hud_y + 6 + i * 18))
+            surf = self.font.render(line, True, (20, 20, 20))
+            self.screen.blit(surf, (8, hud_y + 6 + i * 18))
+            self.draw_calls += 1
+
+
+def main(planner="field", seed=None, metrics_sink=None, profiler=None, maze_file=None, cache=None):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont(None, 20)
+
+    world = World(planner=planner, seed=seed, metrics_sink=metrics_sink, profiler=profiler, maze_file=maze_file,
+                  cache=cache)
+    renderer = Renderer(screen, font, world)
 
-        pygame.display.flip()
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                world.running = False
+
+        running = world.step()
+
+        if profiler is not None:
+            profiler.start()
+        renderer.draw()
+        if profiler is not None:
+            profiler.lap("render")
         clock.tick(FPS)
 
     # Print final metrics to console
-    print("Final Metrics:")
-    print(f"Steps: {steps}")
-    print(f"Conflicts: {conflicts_detected}")
-    print(f"Negotiations(token): {mediator.successful_negotiations}")
-    print(f"Arbitrations(lottery): {mediator.arbitrations}")
-    for i, a in enumerate(agents):
-        print(f"A{i}: Score={a.score}, TotalWait={a.total_wait}, Energy={a.energy:.2f}, Grants={a.corridor_grants}, Alive={a.alive}")
+    if metrics_sink is not None:
+        metrics_sink.close()
+    world.print_metrics()
+    if profiler is not None:
+        profiler.count("draw_calls", renderer.draw_calls)
+        world.print_profile()
+
+def seed_arg(text):
+    # Replay headers store the seed as a signed 64-bit integer
+    seed = int(text)
+    if not -2**63 <= seed < 2**63:
+        raise argparse.ArgumentTypeError(f"must be between {-2**63} and {2**63 - 1}")
+    return seed
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Multi-agent Pac-Man with a shared corridor.")
+    parser.add_argument("--headless", action="store_true", help="run one episode without a window")
+    parser.add_argument("--seed", type=seed_arg, help="seed for every random draw (default: random)")
+    parser.add_argument("--planner", choices=PLANNERS,
+                        help="default: field (with --verify: the recorded planner)")
+    parser.add_argument("--record", metavar="FILE", help="headless run that writes a replay log")
+    parser.add_argument("--verify", metavar="FILE", help="re-run a replay log and compare every tick")
+    parser.add_argument("--metrics", metavar="FILE", help="stream per-tick metrics to .csv or .ndjson")
+    parser.add_argument("--profile", action="store_true", help="time each tick phase and print a summary")
+    parser.add_argument("--cprofile", metavar="FILE", help="run under cProfile and dump the stats to FILE")
+    parser.add_argument("--maze", metavar="FILE", help="play on a maze file instead of the built-in maze")
+    parser.add_argument("--save-maze", metavar="FILE", help="write the built-in maze to a maze file and exit")
+    parser.add_argument("--cache", metavar="DIR", nargs="?", const=mazecache.DEFAULT_DIR,
+                        help="reuse per-maze precomputation from DIR (default: %(const)s)")
+    parser.add_argument("--cache-mb", type=int, default=mazecache.DEFAULT_MAX_BYTES // 2**20,
+                        help="evict least recently used cache entries above this size")
+    args = parser.parse_args()
+    if args.save_maze:
+        save_maze(args.save_maze)
+        print(f"wrote {ROWS}x{COLS} maze to {args.save_maze}")
+        raise SystemExit
+    try:
+        maze_file = use_maze_file(args.maze) if args.maze else None
+    except (OSError, ValueError) as e:
+        parser.error(f"--maze: {e}")
+    cache = mazecache.PrecomputeCache(args.cache, args.cache_mb * 2**20) if args.cache else None
+    planner = args.planner or "field"
+    sink = MetricsSink(args.metrics) if args.metrics else None
+    profiler = Profiler() if args.profile else None
+    cprof = cProfile.Profile() if args.cprofile else None
+    if cprof is not None:
+        cprof.enable()
+
+    try:
+        if args.verify:
+            try:
+                step = verify_replay(args.verify, planner=args.planner, maze_file=maze_file, cache=cache)
+            except ValueError as e:
+                raise SystemExit(e)
+            print("replay matches" if step is None else f"replay diverges at step {step}")
+        elif args.record:
+            seed = args.seed if args.seed is not None else random.randrange(2**62)
+            record_episode(args.record, seed, planner, maze_file, cache).print_metrics()
+        elif args.headless:
+            world = run_headless(planner=planner, seed=args.seed, metrics_sink=sink, profiler=profiler,
+                                 maze_file=maze_file, cache=cache)
+            world.print_metrics()
+            world.print_profile()
+        else:
+            main(planner=planner, seed=args.seed, metrics_sink=sink, profiler=profiler, maze_file=maze_file,
+                 cache=cache)
+    finally:
+        if sink is not None:
+            sink.close()  # a no-op if the run closed it; --record/--verify never use it
+
+    if cprof is not None:
+        cprof.disable()
+        cprof.dump_stats(args.cprofile)
+        pstats.Stats(cprof).sort_stats("cumulative").print_stats(15)
@@ -0,0 +1,64 @@
+"""
+Wall rectangles for the Tk frontends.
+
+Drawing one canvas item per wall cell is what made the Tk mazes slow to
+build; wall_rects() merges the walls of a 0/1 maze matrix into as few
+rectangles as it can, and draw_walls() draws one item per rectangle
+(or a single image) for each frontend.
+"""
+
+try:
+    import tkinter as tk
+except ImportError:  # only draw_walls() needs it; wall_rects() is plain Python
+    tk = None
+
+
+def wall_rects(maze):
+    """
+    Merge wall cells (1) into rectangles: horizontal runs in each row,
+    stacked downward while the next row has the exact same run.
+    Returns (row0, col0, row1, col1) in cells, end exclusive.
+    """
+    rects = []
+    open_runs = {}  # (col0, col1) -> [row0, col0, row1, col1]
+    for r, row in enumerate(maze):
+        runs = set()
+        c = 0
+        while c < len(row):
+            if row[c] == 1:
+                start = c
+                while c < len(row) and row[c] == 1:
+                    c += 1
+                runs.add((start, c))
+            else:
+                c += 1
+        for key in list(open_runs):
+            if key not in runs:
+                rects.append(tuple(open_runs.pop(key)))
+        for key in runs:
+            if key in open_runs:
+                open_runs[key][2] = r + 1
+            else:
+                open_runs[key] = [r, key[0], r + 1, key[1]]
+    rects.extend(tuple(v) for v in open_runs.values())
+    return sorted(rects)
+
+
+def draw_walls(canvas, maze, cell, as_image=False):
+    """
+    Draw the walls of a 0/1 maze matrix in black on a Tk canvas whose
+    background is already white, `cell` pixels per cell: one item per
+    merged wall rectangle, or a single PhotoImage when as_image=True.
+    Returns the PhotoImage (or None); keep a reference to it or Tk
+    garbage-collects the image.
+    """
+    rects = wall_rects(maze)
+    if not as_image:
+        for r0, c0, r1, c1 in rects:
+            canvas.create_rectangle(c0*cell, r0*cell, c1*cell, r1*cell, fill="black", outline="")
+        return None
+    image = tk.PhotoImage(master=canvas, width=len(maze[0])*cell, height=len(maze)*cell)
+    for r0, c0, r1, c1 in rects:
+        image.put("black", to=(c0*cell, r0*cell, c1*cell, r1*cell))
+    canvas.create_image(0, 0, image=image, anchor=tk.NW)
+    return image